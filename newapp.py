@@ -5,14 +5,66 @@ import re
 import csv
 import io
 import copy
+import hashlib
+from urllib.parse import unquote
 import sys # For getting object size, helpful for debugging memory (not used in final, but useful for diagnostics)
+from collections import deque
 
-from flask import Flask, request, jsonify, render_template_string
+from enum import Enum
+from flask import Flask, request, jsonify, render_template_string, g
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson # Optional: much faster JSON encoding/decoding for request and response bodies
+except ImportError:
+    orjson = None
 
 # --- Configuration ---
 app = Flask(__name__)
 
+def _json_default(o):
+    # chat_log is held in a bounded deque while a request is handled (see cap_chat_log)
+    if isinstance(o, deque):
+        return list(o)
+    return DefaultJSONProvider.default(o)
+
+class GameJSONProvider(DefaultJSONProvider):
+    default = staticmethod(_json_default)
+
+class OrjsonProvider(GameJSONProvider):
+    """
+    Routes jsonify() and request.json through orjson. Responses are built straight from
+    the bytes orjson produces, skipping the str round trip of the default provider.
+    """
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS), mimetype=self.mimetype)
+
+app.json = OrjsonProvider(app) if orjson is not None else GameJSONProvider(app)
+
 # --- Game State (Server now primarily provides structure, not persistent state) ---
+
+# Auction lifecycle states. The str mixin keeps the values interchangeable with the plain strings
+# the browser stores and posts back, and lets them serialize to JSON unchanged.
+class Status(str, Enum):
+    WAITING_FOR_INIT = "waiting_for_init"
+    WAITING_FOR_ITEMS = "waiting_for_items"
+    WAITING_FOR_AUCTION_START = "waiting_for_auction_start"
+    BIDDING = "bidding"
+    ITEM_SOLD = "item_sold"
+    GAME_OVER = "game_over"
+
+# Statuses from which the next item in the list may be put up for auction.
+AUCTION_STARTABLE_STATUSES = frozenset({
+    Status.WAITING_FOR_AUCTION_START, Status.ITEM_SOLD, Status.GAME_OVER, Status.WAITING_FOR_ITEMS,
+})
+
 def get_initial_game_state():
     return {
         "participants": {},
@@ -22,7 +74,7 @@ def get_initial_game_state():
         "current_item": None,
         "current_bid": 0,
         "high_bidder": None,
-        "status": "waiting_for_init",
+        "status": Status.WAITING_FOR_INIT,
         "chat_log": [{"sender": "Auctioneer", "message": "Welcome! To begin, type: `start game players John, Jane budget 100` (Or add your own player names and budget!)."}],
         "last_processed_action_hash": None, # Stored per-client, but needed for server-side logic
         "player_inventory_sort": {"key": "name", "order": "asc"},
@@ -35,108 +87,167 @@ def get_initial_game_state():
 # We'll keep a reference to a default initial state for 'reset' and initial load.
 DEFAULT_INITIAL_GAME_STATE = get_initial_game_state()
 
-# --- Rule-Based Command Processing ---
+# Hard cap on chat_log entries, so a misbehaving client can't make every request pay for an
+# unbounded log. The browser client trims far below this before sending.
+MAX_CHAT_LOG_ENTRIES = 500
+
+def cap_chat_log(game_state):
+    # A ring buffer: keeps the newest entries and stays bounded as the handlers append to it.
+    chat_log = game_state.get("chat_log")
+    if isinstance(chat_log, list):
+        game_state["chat_log"] = deque(chat_log, maxlen=MAX_CHAT_LOG_ENTRIES)
+
+# Clients that send an `X-Chat-Delta` header get back only the chat entries appended while handling
+# their request (flagged with "chat_delta"), instead of an echo of the log they just posted.
+def remember_received_chat(game_state):
+    if request.headers.get("X-Chat-Delta"):
+        g.received_chat_log = list(game_state["chat_log"])
+
+# The only keys a bid, a pass or unrecognised chat can change besides chat_log.
+BID_STATE_KEYS = ("current_bid", "high_bidder", "last_processed_action_hash")
+
+def state_for_client(game_state, changed_keys=None):
+    # `changed_keys` lets a route that knows which keys it touched send back just those (flagged
+    # with "state_delta"); it only applies together with a chat delta, which the client opted into.
+    received_chat_log = g.get("received_chat_log")
+    if received_chat_log is None:
+        return game_state
+    chat_log = list(game_state["chat_log"])
+    received_count = len(received_chat_log)
+    # Anything other than pure appends (e.g. init_game starting a fresh log) goes out in full
+    if len(chat_log) < received_count or chat_log[:received_count] != received_chat_log:
+        return game_state
+    if changed_keys is None:
+        response_state = dict(game_state)
+    else:
+        response_state = {key: game_state[key] for key in changed_keys}
+        response_state["state_delta"] = True
+    response_state["chat_log"] = chat_log[received_count:]
+    response_state["chat_delta"] = True
+    return response_state
 
-# This function remains largely the same, but it now explicitly takes `current_game_state_for_logic`
-# as an argument, rather than relying on a global server-side `game_state`.
-def process_user_command(user_input, current_game_state_for_logic):
-    """
-    Parses user input using rule-based logic to determine game actions and narratives.
-    Returns (narrative, game_action).
-    """
-    narrative = ""
-    game_action = {"type": "no_action"}
-    
-    user_input_lower = user_input.lower().strip()
+# --- Rule-Based Command Processing ---
 
+# Command patterns are compiled once at import time. Case-insensitivity lives in the
+# compiled flag, so the input only needs stripping; names are title-cased downstream.
+_INIT_RE = re.compile(r"start game players ([\w,\s]+) budget (\d+)\.?$", re.IGNORECASE)
+_ADD_ITEMS_RE = re.compile(r"add (.*)", re.IGNORECASE)
+_SHUFFLE_RE = re.compile(r"shuffle", re.IGNORECASE)
+_NO_SALE_RE = re.compile(r"no sale", re.IGNORECASE)
+_SELL_RE = re.compile(r"sell ([\w\s]+) (\d+)\.?$", re.IGNORECASE)
+_SELL_IT_RE = re.compile(r"sell it", re.IGNORECASE)
+_START_AUCTION_RE = re.compile(r"auction (?:first|next|([a-zA-Z0-9\s]+))\b\.?", re.IGNORECASE)
+# Used with fullmatch. The lazy name group stops at the first " bid " that is followed by the amount,
+# instead of swallowing the whole input and backtracking to it; only one such position can exist.
+_BID_RE = re.compile(r"([\w\s]+?) bid (\d+)\.?", re.IGNORECASE)
+_PASS_RE = re.compile(r"([\w\s]+) pass\.?", re.IGNORECASE)
+
+def _may_be_bid_or_pass(text):
+    # Cheap substring pre-check so unrecognised input never reaches _BID_RE / _PASS_RE. Non-ASCII
+    # input skips it: IGNORECASE also matches a few non-ASCII letters (e.g. dotless i) that lower() keeps.
+    if not text.isascii():
+        return True
+    lowered = text.lower()
+    return " bid " in lowered or " pass" in lowered
+
+# Each handler below owns the rule(s) for one leading verb. It returns (narrative, game_action)
+# when the command is its own, or None to let the bid/pass rules try the input instead.
+def _handle_start(user_input_stripped, current_game_state_for_logic):
     # 1. Initialize Game (Simplified)
-    match = re.match(r"start game players ([\w,\s]+) budget (\d+)\.?$", user_input_lower)
-    if match and current_game_state_for_logic["status"] == "waiting_for_init":
-        player_names = [p.strip() for p in match.group(1).split(',') if p.strip()]
-        budget = int(match.group(2))
-        if player_names and budget > 0:
-            narrative = f"Welcome, {', '.join(p.title() for p in player_names)}! Each of you starts with {budget} credits. Let the game begin!"
-            game_action = {"type": "init_game", "players": player_names, "budget": budget}
-            return narrative, game_action
-        else:
-            narrative = "Invalid players or budget specified for starting the game. Please use: `start game players John, Jane budget 100`."
-            return narrative, {"type": "no_action"}
-    elif match and current_game_state_for_logic["status"] != "waiting_for_init":
+    match = _INIT_RE.match(user_input_stripped)
+    if not match:
+        return None
+    if current_game_state_for_logic["status"] != Status.WAITING_FOR_INIT:
         narrative = "A game is already in progress. Please reset the game to start a new one."
         return narrative, {"type": "no_action"}
+    player_names = [p.strip() for p in match.group(1).split(',') if p.strip()]
+    budget = int(match.group(2))
+    if player_names and budget > 0:
+        narrative = f"Welcome, {', '.join(p.title() for p in player_names)}! Each of you starts with {budget} credits. Let the game begin!"
+        game_action = {"type": "init_game", "players": player_names, "budget": budget}
+        return narrative, game_action
+    narrative = "Invalid players or budget specified for starting the game. Please use: `start game players John, Jane budget 100`."
+    return narrative, {"type": "no_action"}
 
+def _handle_add(user_input_stripped, current_game_state_for_logic):
     # 2. Add Items (Simplified)
-    match = re.match(r"add (.*)", user_input_lower)
-    if match and current_game_state_for_logic["status"] != "waiting_for_init":
-        items_str = match.group(1)
-        items = [item.strip() for item in items_str.split(',') if item.strip()]
-        if items:
-            narrative = f"Excellent! We have {', '.join(item.title() for item in items)} ready for auction."
-            game_action = {"type": "add_items", "items": items}
-            return narrative, game_action
-        else:
-            narrative = "No items specified to add. Please use: `add Car, House, Boat`"
-            return narrative, {"type": "no_action"}
+    match = _ADD_ITEMS_RE.match(user_input_stripped)
+    if not match or current_game_state_for_logic["status"] == Status.WAITING_FOR_INIT:
+        return None
+    items_str = match.group(1)
+    items = [item.strip() for item in items_str.split(',') if item.strip()]
+    if items:
+        narrative = f"Excellent! We have {', '.join(item.title() for item in items)} ready for auction."
+        game_action = {"type": "add_items", "items": items}
+        return narrative, game_action
+    narrative = "No items specified to add. Please use: `add Car, House, Boat`"
+    return narrative, {"type": "no_action"}
 
+def _handle_shuffle(user_input_stripped, current_game_state_for_logic):
     # 3. Shuffle Items (Simplified)
-    if user_input_lower == "shuffle":
-        if current_game_state_for_logic["item_list"]:
-            narrative = "Auctioneer: A little shake-up in the inventory! Items have been reordered."
-            game_action = {"type": "shuffle_items"}
-            return narrative, game_action
-        else:
-            narrative = "Auctioneer: No items available to shuffle yet. Please `add Car, House` first."
-            return narrative, {"type": "no_action"}
+    if not _SHUFFLE_RE.fullmatch(user_input_stripped):
+        return None
+    if current_game_state_for_logic["item_list"]:
+        narrative = "Auctioneer: A little shake-up in the inventory! Items have been reordered."
+        game_action = {"type": "shuffle_items"}
+        return narrative, game_action
+    narrative = "Auctioneer: No items available to shuffle yet. Please `add Car, House` first."
+    return narrative, {"type": "no_action"}
 
+def _handle_no_sale(user_input_stripped, current_game_state_for_logic):
     # 4. Explicit "No Sale" command
-    if user_input_lower == "no sale":
-        if current_game_state_for_logic["current_item"]:
-            narrative = f"As there are no valid bids on the '{current_game_state_for_logic['current_item']}', it remains unsold for now. Perhaps it will return later, or we move on."
-            game_action = {"type": "sell_item", "item": current_game_state_for_logic["current_item"], "player": None, "amount": 0}
-            return narrative, game_action
-        else:
-            narrative = "There is no item currently under auction to declare 'no sale'. Please `auction Car` first."
-            return narrative, {"type": "no_action"}
+    if not _NO_SALE_RE.fullmatch(user_input_stripped):
+        return None
+    if current_game_state_for_logic["current_item"]:
+        narrative = f"As there are no valid bids on the '{current_game_state_for_logic['current_item']}', it remains unsold for now. Perhaps it will return later, or we move on."
+        game_action = {"type": "sell_item", "item": current_game_state_for_logic["current_item"], "player": None, "amount": 0}
+        return narrative, game_action
+    narrative = "There is no item currently under auction to declare 'no sale'. Please `auction Car` first."
+    return narrative, {"type": "no_action"}
 
+def _handle_sell(user_input_stripped, current_game_state_for_logic):
     # 5. Sell Item (Explicit - Simplified: `sell John 30`) - MUST COME BEFORE IMPLICIT SELL
-    match = re.match(r"sell ([\w\s]+) (\d+)\.?$", user_input_lower)
+    match = _SELL_RE.match(user_input_stripped)
     if match and current_game_state_for_logic["current_item"]:
         player_name = match.group(1).strip().title()
         amount = int(match.group(2))
-        
+
         if player_name not in current_game_state_for_logic["participants"]:
             narrative = f"Player '{player_name}' not recognized. Cannot sell item. Recognized players: {', '.join(current_game_state_for_logic['participants'].keys())}."
             return narrative, {"type": "no_action"}
         if amount > current_game_state_for_logic["participants"][player_name]:
             narrative = f"'{player_name}' cannot afford {amount} credits for '{current_game_state_for_logic['current_item']}'. Sale cancelled."
             return narrative, {"type": "no_action"}
-        
+
         narrative = f"Sold! The '{current_game_state_for_logic['current_item']}' goes to {player_name} for {amount} credits!"
         game_action = {"type": "sell_item", "item": current_game_state_for_logic["current_item"], "player": player_name, "amount": amount}
         return narrative, game_action
-    elif match and not current_game_state_for_logic["current_item"]:
+    elif match:
         narrative = "There is no item currently under auction to sell. Please `auction Car` first."
         return narrative, {"type": "no_action"}
 
     # 6. Sell Item (Implicit - Simplified: `sell it`) - MUST COME AFTER EXPLICIT SELL
-    if user_input_lower == "sell it":
-        if current_game_state_for_logic["current_item"]:
-            if current_game_state_for_logic["high_bidder"] and current_game_state_for_logic["current_bid"] > 0:
-                player_name = current_game_state_for_logic["high_bidder"]
-                amount = current_game_state_for_logic["current_bid"]
-                narrative = f"Sold! The '{current_game_state_for_logic['current_item']}' goes to {player_name} for {amount} credits!"
-                game_action = {"type": "sell_item", "item": current_game_state_for_logic["current_item"], "player": player_name, "amount": amount}
-            else:
-                narrative = f"As there are no valid bids on the '{current_game_state_for_logic['current_item']}', it remains unsold for now. Perhaps it will return later, or we move on."
-                game_action = {"type": "sell_item", "item": current_game_state_for_logic["current_item"], "player": None, "amount": 0}
-            return narrative, game_action
+    if not _SELL_IT_RE.fullmatch(user_input_stripped):
+        return None
+    if current_game_state_for_logic["current_item"]:
+        if current_game_state_for_logic["high_bidder"] and current_game_state_for_logic["current_bid"] > 0:
+            player_name = current_game_state_for_logic["high_bidder"]
+            amount = current_game_state_for_logic["current_bid"]
+            narrative = f"Sold! The '{current_game_state_for_logic['current_item']}' goes to {player_name} for {amount} credits!"
+            game_action = {"type": "sell_item", "item": current_game_state_for_logic["current_item"], "player": player_name, "amount": amount}
         else:
-            narrative = "There is no item currently under auction to sell. Please `auction Car` first."
-            return narrative, {"type": "no_action"}
+            narrative = f"As there are no valid bids on the '{current_game_state_for_logic['current_item']}', it remains unsold for now. Perhaps it will return later, or we move on."
+            game_action = {"type": "sell_item", "item": current_game_state_for_logic["current_item"], "player": None, "amount": 0}
+        return narrative, game_action
+    narrative = "There is no item currently under auction to sell. Please `auction Car` first."
+    return narrative, {"type": "no_action"}
 
+def _handle_auction(user_input_stripped, current_game_state_for_logic):
     # 7. Start Item Auction (Simplified: `auction Car` or `auction first`)
-    match = re.match(r"auction (?:first|next|([a-zA-Z0-9\s]+))\b\.?", user_input_lower)
-    if match and current_game_state_for_logic["status"] != "waiting_for_init" and current_game_state_for_logic["item_list"]:
+    match = _START_AUCTION_RE.match(user_input_stripped)
+    if not match:
+        return None
+    if current_game_state_for_logic["status"] != Status.WAITING_FOR_INIT and current_game_state_for_logic["item_list"]:
         item_name_group = match.group(1)
         item_to_start_name = None
 
@@ -149,10 +260,10 @@ def process_user_command(user_input, current_game_state_for_logic):
             narrative = "No item found to start an auction for. Please add items or specify a valid item name."
             return narrative, {"type": "no_action"}
 
-        if item_to_start_name == current_game_state_for_logic["current_item"] and current_game_state_for_logic["status"] == "bidding":
+        if item_to_start_name == current_game_state_for_logic["current_item"] and current_game_state_for_logic["status"] == Status.BIDDING:
             narrative = f"Auction for '{item_to_start_name}' is already underway! What's your bid?"
             return narrative, {"type": "no_action"}
-        
+
         # Check if the requested item is actually in the list (if specified by name)
         if item_to_start_name in current_game_state_for_logic["item_list"] or \
            (item_to_start_name.endswith(" (current)") and item_to_start_name.replace(" (current)","") in current_game_state_for_logic["item_list"]):
@@ -165,16 +276,18 @@ def process_user_command(user_input, current_game_state_for_logic):
         else:
             narrative = f"Item '{item_to_start_name}' not found in the list of available items. Available: {', '.join(current_game_state_for_logic['item_list'])}. Please use: `auction Car` or `auction first`."
             return narrative, {"type": "no_action"}
-    elif match and not current_game_state_for_logic["item_list"]:
+    elif not current_game_state_for_logic["item_list"]:
         narrative = "There are no items available to auction yet. Please add some first using: `add Car, House`."
         return narrative, {"type": "no_action"}
-    elif match and current_game_state_for_logic["status"] == "bidding":
+    elif current_game_state_for_logic["status"] == Status.BIDDING:
         narrative = f"An auction for '{current_game_state_for_logic['current_item']}' is already in progress. Please bid or sell it first using: `John bid 10` or `sell it!`."
         return narrative, {"type": "no_action"}
+    return None
 
+def _handle_bid_or_pass(user_input_stripped, current_game_state_for_logic):
     # 8. Place Bid (Simplified: `John bid 10`)
-    match = re.match(r"([\w\s]+) bid (\d+)\.?$", user_input_lower)
-    if match and current_game_state_for_logic["status"] == "bidding":
+    match = _BID_RE.fullmatch(user_input_stripped)
+    if match and current_game_state_for_logic["status"] == Status.BIDDING:
         player_name = match.group(1).strip().title()
         amount = int(match.group(2))
 
@@ -187,16 +300,16 @@ def process_user_command(user_input, current_game_state_for_logic):
         if amount > current_game_state_for_logic["participants"][player_name]:
             narrative = f"'{player_name}' cannot afford a bid of {amount} credits. They only have {current_game_state_for_logic['participants'][player_name]} credits remaining."
             return narrative, {"type": "no_action"}
-        
+
         narrative = f"A bold bid of {amount} credits from {player_name}! The current high bid for '{current_game_state_for_logic['current_item']}' stands at {amount}. Any other contenders?"
         game_action = {"type": "bid", "player": player_name, "amount": amount}
         return narrative, game_action
-    elif match and current_game_state_for_logic["status"] != "bidding":
+    elif match:
         narrative = "No item is currently under auction. You need to start an auction first. Use: `auction Car`."
         return narrative, {"type": "no_action"}
 
     # 9. Player Passes (Simplified: `John pass`)
-    match = re.match(r"([\w\s]+) pass\.?", user_input_lower)
+    match = _PASS_RE.match(user_input_stripped)
     if match and current_game_state_for_logic["current_item"]:
         player_name = match.group(1).strip().title()
         if player_name not in current_game_state_for_logic["participants"]:
@@ -205,38 +318,78 @@ def process_user_command(user_input, current_game_state_for_logic):
         narrative = f"{player_name} passes on '{current_game_state_for_logic['current_item']}'. Any other bids?"
         game_action = {"type": "pass", "player": player_name}
         return narrative, game_action
-    elif match and not current_game_state_for_logic["current_item"]:
+    elif match:
         narrative = "No item is currently under auction to pass on."
         return narrative, {"type": "no_action"}
-        
+    return None
+
+# Keyed on the lowercased first word of the command. Bids and passes lead with a player name,
+# so they are not in the table and are tried whenever the verb handler declines the input.
+_COMMAND_HANDLERS = {
+    "start": _handle_start,
+    "add": _handle_add,
+    "shuffle": _handle_shuffle,
+    "no": _handle_no_sale,
+    "sell": _handle_sell,
+    "auction": _handle_auction,
+}
+
+# This function remains largely the same, but it now explicitly takes `current_game_state_for_logic`
+# as an argument, rather than relying on a global server-side `game_state`.
+def process_user_command(user_input, current_game_state_for_logic):
+    """
+    Parses user input using rule-based logic to determine game actions and narratives.
+    Returns (narrative, game_action).
+    """
+    user_input_stripped = user_input.strip()
+    tokens = user_input_stripped.split(None, 1)
+
+    handler = _COMMAND_HANDLERS.get(tokens[0].lower()) if tokens else None
+    result = handler(user_input_stripped, current_game_state_for_logic) if handler else None
+    if result is None and _may_be_bid_or_pass(user_input_stripped):
+        result = _handle_bid_or_pass(user_input_stripped, current_game_state_for_logic)
+    if result is not None:
+        return result
+
     return f"Auctioneer: I didn't understand your command: '{user_input}'. Please try again with a clear instruction, or refer to the 'Command Assistant' for examples. Common commands include: `John bid 10`, `sell it!`, `auction Car`, `no sale`.", {"type": "no_action"}
 
 
 # --- Game Logic Functions ---
 
+# Every field any action type carries (including the /set_inventory_sort pseudo-action), in a fixed order
+_ACTION_HASH_KEYS = ("type", "player", "amount", "item", "items", "players", "budget", "key", "order")
+
+def _action_fingerprint(action):
+    """
+    Hash of an action's fields, used to spot a repeated action.
+    List values (players, items) are turned into tuples so they are hashable.
+    """
+    return hash(tuple(tuple(value) if isinstance(value, list) else value for value in map(action.get, _ACTION_HASH_KEYS)))
+
 # `apply_game_action` now takes `current_game_state` as an argument
-def apply_game_action(action, current_game_state):
+def apply_game_action(action, current_game_state, prevalidated=False):
     """
-    Applies a parsed GAME_ACTION to a given game_state.
+    Applies a parsed GAME_ACTION to a given game_state, updating it in place.
+    `prevalidated` marks actions that process_user_command has already checked against this same
+    state; for bids that skips re-checking the player, bid floor and budget.
     Returns a tuple: (modified_game_state, result_message_string, bool_state_actually_changed).
     """
-    # Create a deep copy to work on, ensuring no side effects on the original until explicitly returned
-    modified_game_state = copy.deepcopy(current_game_state)
+    # Every caller passes a state parsed from its own request body, so there is nothing to protect
+    # with a copy. Error returns below all happen before the state is touched.
+    modified_game_state = current_game_state
     
     action_type = action.get("type")
     state_actually_changed = False
     result_message = ""
 
     # Deduplicate actions: compute hash before any state changes
-    action_hash = hash(json.dumps(action, sort_keys=True))
+    action_hash = _action_fingerprint(action)
     
     if action_type not in ["pass", "no_action"] and action_hash == modified_game_state.get("last_processed_action_hash"):
         print(f"Skipping duplicate action: {action_type}")
         return modified_game_state, "Duplicate action skipped.", False
 
-    # Set hash for the action being processed
     if action_type != "no_action":
-        modified_game_state["last_processed_action_hash"] = action_hash
         state_actually_changed = True # Assume state will change for non-no_action types
 
     # Now apply the action to modified_game_state
@@ -246,10 +399,12 @@ def apply_game_action(action, current_game_state):
         if not players or budget is None:
             return current_game_state, "Error: Missing players or budget for init_game.", False # Return original state
         
-        modified_game_state["participants"] = {p.title(): budget for p in players}
-        modified_game_state["player_items"] = {p.title(): [] for p in players}
+        # Names are title-cased once here; every later lookup uses these canonical keys
+        player_names = [p.title() for p in players]
+        modified_game_state["participants"] = {p: budget for p in player_names}
+        modified_game_state["player_items"] = {p: [] for p in player_names}
         modified_game_state["initial_budget"] = budget
-        modified_game_state["status"] = "waiting_for_items"
+        modified_game_state["status"] = Status.WAITING_FOR_ITEMS
         modified_game_state["chat_log"] = DEFAULT_INITIAL_GAME_STATE["chat_log"].copy() # Reset chat on new game
         modified_game_state["chat_log"].append({"sender": "System", "message": f"Game initialized with players: {', '.join(modified_game_state['participants'].keys())}. Each has {budget} credits."})
         result_message = f"Game initialized for {len(players)} players."
@@ -261,10 +416,12 @@ def apply_game_action(action, current_game_state):
         
         items_to_add = [item.strip().title() for item in items if item.strip()]
         modified_game_state["item_list"].extend(items_to_add)
-        if modified_game_state["status"] == "waiting_for_items":
-            modified_game_state["status"] = "waiting_for_auction_start"
-            modified_game_state["chat_log"].append({"sender": "Auctioneer", "message": f"Excellent, items have been added! You can now use the 'Auction Next Item' button or type 'auction first'."})
-        modified_game_state["chat_log"].append({"sender": "System", "message": f"Items added: {', '.join(items_to_add)}."})
+        new_chat_entries = []
+        if modified_game_state["status"] == Status.WAITING_FOR_ITEMS:
+            modified_game_state["status"] = Status.WAITING_FOR_AUCTION_START
+            new_chat_entries.append({"sender": "Auctioneer", "message": f"Excellent, items have been added! You can now use the 'Auction Next Item' button or type 'auction first'."})
+        new_chat_entries.append({"sender": "System", "message": f"Items added: {', '.join(items_to_add)}."})
+        modified_game_state["chat_log"].extend(new_chat_entries)
         result_message = f"Added {len(items_to_add)} items."
 
     elif action_type == "start_item_auction":
@@ -272,7 +429,7 @@ def apply_game_action(action, current_game_state):
         if not item_name:
             return current_game_state, "Error: Missing item name for start_item_auction.", False
         
-        if item_name == modified_game_state["current_item"] and modified_game_state["status"] == "bidding":
+        if item_name == modified_game_state["current_item"] and modified_game_state["status"] == Status.BIDDING:
             return current_game_state, f"Auction for '{item_name}' is already underway.", False
         
         if item_name not in modified_game_state["item_list"]:
@@ -281,24 +438,27 @@ def apply_game_action(action, current_game_state):
         modified_game_state["current_item"] = item_name
         modified_game_state["current_bid"] = 0 
         modified_game_state["high_bidder"] = None
-        modified_game_state["status"] = "bidding"
+        modified_game_state["status"] = Status.BIDDING
         modified_game_state["chat_log"].append({"sender": "System", "message": f"Auction for '{item_name}' has started! Current bid: {modified_game_state['current_bid']}"})
         result_message = f"Auction started for '{item_name}'."
 
     elif action_type == "bid":
-        player = action.get("player").title()
+        player = action.get("player") # Already title-cased by the command parser
         amount = action.get("amount")
 
-        if not player or amount is None:
-            return current_game_state, "Error: Missing player or amount for bid.", False
-        if player not in modified_game_state["participants"]:
-            return current_game_state, f"Error: Player '{player}' not recognized.", False
-        if modified_game_state["current_item"] is None:
-             return current_game_state, "Error: No item is currently being auctioned to bid on.", False
-        if amount <= modified_game_state["current_bid"]:
-            return current_game_state, f"Error: Bid of {amount} is not higher than current bid of {modified_game_state['current_bid']}. Minimum bid is {modified_game_state['current_bid'] + 1}.", False
-        if amount > modified_game_state["participants"][player]:
-            return current_game_state, f"Error: Player '{player}' does not have enough budget ({modified_game_state['participants'][player]}) for a bid of {amount}.", False
+        if not prevalidated:
+            participants = modified_game_state["participants"]
+            current_bid = modified_game_state["current_bid"]
+            if not player or amount is None:
+                return current_game_state, "Error: Missing player or amount for bid.", False
+            if player not in participants:
+                return current_game_state, f"Error: Player '{player}' not recognized.", False
+            if modified_game_state["current_item"] is None:
+                 return current_game_state, "Error: No item is currently being auctioned to bid on.", False
+            if amount <= current_bid:
+                return current_game_state, f"Error: Bid of {amount} is not higher than current bid of {current_bid}. Minimum bid is {current_bid + 1}.", False
+            if amount > participants[player]:
+                return current_game_state, f"Error: Player '{player}' does not have enough budget ({participants[player]}) for a bid of {amount}.", False
         
         modified_game_state["current_bid"] = amount
         modified_game_state["high_bidder"] = player
@@ -313,45 +473,58 @@ def apply_game_action(action, current_game_state):
         if item_to_sell is None:
              return current_game_state, "Error: No item is currently under auction to be sold or declared unsold.", False
 
-        if item_to_sell in modified_game_state["item_list"]:
-            modified_game_state["item_list"].remove(item_to_sell)
+        # The item on the block is almost always the head of the list (auctions run in list order),
+        # so check there before falling back to a single remove() scan.
+        item_list = modified_game_state["item_list"]
+        if item_list and item_list[0] == item_to_sell:
+            del item_list[0]
+        else:
+            try:
+                item_list.remove(item_to_sell)
+            except ValueError:
+                pass
         
+        participants = modified_game_state["participants"]
+        new_chat_entries = [] # Written to chat_log in one extend once the outcome is known
+        auction_history = modified_game_state["auction_history"]
+
         sale_successful = False
-        if actual_player and actual_player in modified_game_state["participants"] and actual_amount > 0:
-            if modified_game_state["participants"][actual_player] < actual_amount:
-                modified_game_state["chat_log"].append({"sender": "System", "message": f"Error: Player '{actual_player}' cannot afford {actual_amount} credits for '{item_to_sell}'. Item declared UNSOLD due to affordability."})
-                modified_game_state["auction_history"].append(f"'{item_to_sell}' was declared UNSOLD (affordability issue).")
+        budget = participants.get(actual_player) if actual_player else None
+        if budget is not None and actual_amount > 0:
+            if budget < actual_amount:
+                new_chat_entries.append({"sender": "System", "message": f"Error: Player '{actual_player}' cannot afford {actual_amount} credits for '{item_to_sell}'. Item declared UNSOLD due to affordability."})
+                auction_history.append(f"'{item_to_sell}' was declared UNSOLD (affordability issue).")
             else:
-                modified_game_state["participants"][actual_player] -= actual_amount
+                participants[actual_player] = budget - actual_amount
                 # Ensure player_items key exists for the player
-                if actual_player not in modified_game_state["player_items"]:
-                    modified_game_state["player_items"][actual_player] = []
-                modified_game_state["player_items"][actual_player].append({"name": item_to_sell, "price": actual_amount})
-                modified_game_state["auction_history"].append(f"'{item_to_sell}' sold to {actual_player} for {actual_amount} credits.")
-                modified_game_state["chat_log"].append({"sender": "System", "message": f"'{item_to_sell}' sold to {actual_player} for {actual_amount} credits. {actual_player}'s new budget: {modified_game_state['participants'][actual_player]}."})
+                modified_game_state["player_items"].setdefault(actual_player, []).append({"name": item_to_sell, "price": actual_amount})
+                auction_history.append(f"'{item_to_sell}' sold to {actual_player} for {actual_amount} credits.")
+                new_chat_entries.append({"sender": "System", "message": f"'{item_to_sell}' sold to {actual_player} for {actual_amount} credits. {actual_player}'s new budget: {participants[actual_player]}."})
                 sale_successful = True
         
         if not sale_successful:
-            modified_game_state["auction_history"].append(f"'{item_to_sell}' was declared UNSOLD (no valid bids).")
-            modified_game_state["chat_log"].append({"sender": "System", "message": f"'{item_to_sell}' declared UNSOLD. No valid bids were received."})
+            auction_history.append(f"'{item_to_sell}' was declared UNSOLD (no valid bids).")
+            new_chat_entries.append({"sender": "System", "message": f"'{item_to_sell}' declared UNSOLD. No valid bids were received."})
         
         modified_game_state["current_item"] = None
         modified_game_state["current_bid"] = 0
         modified_game_state["high_bidder"] = None
         
-        if not modified_game_state["item_list"]:
-            modified_game_state["status"] = "game_over"
-            modified_game_state["chat_log"].append({"sender": "System", "message": "All items sold or declared unsold! Game Over. Reset the game to play again."})
+        if not item_list:
+            modified_game_state["status"] = Status.GAME_OVER
+            new_chat_entries.append({"sender": "System", "message": "All items sold or declared unsold! Game Over. Reset the game to play again."})
             result_message = "Game Over: All items processed."
         else:
-            next_item = modified_game_state["item_list"][0]
+            next_item = item_list[0]
             modified_game_state["current_item"] = next_item
             modified_game_state["current_bid"] = 0 
             modified_game_state["high_bidder"] = None
-            modified_game_state["status"] = "bidding"
-            modified_game_state["chat_log"].append({"sender": "System", "message": f"Auction for '{next_item}' has started! Current bid: {modified_game_state['current_bid']}"})
+            modified_game_state["status"] = Status.BIDDING
+            new_chat_entries.append({"sender": "System", "message": f"Auction for '{next_item}' has started! Current bid: {modified_game_state['current_bid']}"})
             result_message = f"Sale processed. Auction for '{next_item}' has now started."
 
+        modified_game_state["chat_log"].extend(new_chat_entries)
+
     elif action_type == "pass":
         player = action.get("player")
         modified_game_state["chat_log"].append({"sender": "System", "message": f"{player} passes on '{modified_game_state['current_item']}'."})
@@ -375,6 +548,10 @@ def apply_game_action(action, current_game_state):
         result_message = f"Unknown game action type: {action_type}"
         state_actually_changed = False
 
+    # Set hash for the action that was processed (rejected actions returned early and leave no trace)
+    if action_type != "no_action":
+        modified_game_state["last_processed_action_hash"] = action_hash
+
     return modified_game_state, result_message, state_actually_changed
 
 
@@ -402,14 +579,16 @@ def get_state_from_request():
         # This handles cases where new keys are added to get_initial_game_state
         for key in DEFAULT_INITIAL_GAME_STATE.keys():
             if key not in client_game_state:
-                client_game_state[key] = DEFAULT_INITIAL_GAME_STATE[key]
+                client_game_state[key] = copy.deepcopy(DEFAULT_INITIAL_GAME_STATE[key])
+        cap_chat_log(client_game_state)
+        remember_received_chat(client_game_state)
         return client_game_state
     except Exception as e:
         print(f"Error parsing client game state from request.json: {e}. Returning initial default.")
         # Print the full traceback for better debugging
         import traceback
         traceback.print_exc()
-        return DEFAULT_INITIAL_GAME_STATE
+        return get_initial_game_state() # Fresh copy: callers append to it
 
 @app.route('/process_chat', methods=['POST'])
 def process_chat_route():
@@ -417,7 +596,7 @@ def process_chat_route():
     client_game_state = get_state_from_request()
 
     if not user_input:
-        return jsonify({"success": False, "message": "No message provided.", "game_state": client_game_state}), 400
+        return jsonify({"success": False, "message": "No message provided.", "game_state": state_for_client(client_game_state)}), 400
 
     # Frontend adds 'You' message instantly. Server adds 'Auctioneer' and 'System' messages.
     narrative, game_action = process_user_command(user_input, client_game_state)
@@ -426,76 +605,90 @@ def process_chat_route():
     client_game_state["chat_log"].append({"sender": "Auctioneer", "message": narrative})
 
     if game_action and game_action.get("type") != "no_action":
-        new_game_state, action_result_msg, state_actually_changed = apply_game_action(game_action, client_game_state)
+        # The parser validated its action against this same state, so apply_game_action need not repeat it
+        new_game_state, action_result_msg, state_actually_changed = apply_game_action(game_action, client_game_state, prevalidated=True)
         
         if action_result_msg != "Duplicate action skipped." and state_actually_changed:
             new_game_state["chat_log"].append({"sender": "System", "message": f"Action processed: {action_result_msg}"})
         
-        # Ensure player_items consistency for new players
-        for p in new_game_state["participants"]:
-            if p not in new_game_state["player_items"]:
-                new_game_state["player_items"][p] = []
+        # No participants/player_items sync pass here: init_game creates both maps together, sell_item
+        # adds a missing buyer entry itself, and the client's refreshDerivedState() reconciles the two.
 
+        # Bids and passes are the bulk of the traffic and only move the bid, so only that goes back
+        changed_keys = BID_STATE_KEYS if game_action["type"] in ("bid", "pass") else None
         return jsonify({
             "success": True,
             "narrative": narrative,
-            "game_state": new_game_state, # Return the modified state to client
+            "game_state": state_for_client(new_game_state, changed_keys), # Return the modified state to client
         })
     else:
         # No action, just chat update or error message
         return jsonify({
             "success": True, # Still a successful chat processing
             "narrative": narrative,
-            "game_state": client_game_state # Return original state if no game action
+            "game_state": state_for_client(client_game_state, BID_STATE_KEYS) # Only the chat changed
         })
 
 @app.route('/upload_items', methods=['POST'])
 def upload_items():
-    file = request.files.get('file')
-    # CRITICAL FIX: For FormData, game_state is in request.form, not request.json
-    client_game_state_str = request.form.get('game_state')
+    if request.mimetype == 'text/plain':
+        # Streamed upload: the body is the game_state JSON on one line, followed by the file itself.
+        # The items are parsed straight off the request stream, without multipart parsing or spooling.
+        filename = unquote(request.headers.get('X-Filename', ''))
+        # The state line is read as bytes: decoding starts with the file, inside the try below,
+        # so an upload that isn't UTF-8 gets the usual JSON error response.
+        body_stream = io.BufferedReader(request.stream)
+        client_game_state_str = body_stream.readline()
+        file_stream = io.TextIOWrapper(body_stream, encoding='utf-8', newline='')
+    else:
+        file = request.files.get('file')
+        filename = file.filename if file else ''
+        # Decode the upload as it is read instead of materialising the whole file as bytes and again as str
+        file_stream = io.TextIOWrapper(file.stream, encoding='utf-8', newline='') if file else None
+        # CRITICAL FIX: For FormData, game_state is in request.form, not request.json
+        client_game_state_str = request.form.get('game_state')
     
     # Default to initial state if string is missing or malformed
-    client_game_state = DEFAULT_INITIAL_GAME_STATE
+    client_game_state = get_initial_game_state()
     if client_game_state_str:
         try:
             client_game_state = json.loads(client_game_state_str)
             # Basic validation/defaulting for loaded state as in get_state_from_request
             for key in DEFAULT_INITIAL_GAME_STATE.keys():
                 if key not in client_game_state:
-                    client_game_state[key] = DEFAULT_INITIAL_GAME_STATE[key]
+                    client_game_state[key] = copy.deepcopy(DEFAULT_INITIAL_GAME_STATE[key])
+            cap_chat_log(client_game_state)
+            remember_received_chat(client_game_state)
         except json.JSONDecodeError as e:
             print(f"Error decoding game_state string from form data: {e}. Using initial default state.")
             import traceback
             traceback.print_exc()
-            client_game_state = DEFAULT_INITIAL_GAME_STATE
+            client_game_state = get_initial_game_state()
         except Exception as e:
             print(f"Unexpected error processing game_state from form data: {e}. Using initial default state.")
             import traceback
             traceback.print_exc()
-            client_game_state = DEFAULT_INITIAL_GAME_STATE
+            client_game_state = get_initial_game_state()
 
 
-    if not file or file.filename == '':
-        return jsonify({"success": False, "message": "No file selected or provided.", "game_state": client_game_state}), 400
+    if not filename:
+        return jsonify({"success": False, "message": "No file selected or provided.", "game_state": state_for_client(client_game_state)}), 400
 
-    if not (file.filename.endswith('.csv') or file.filename.endswith('.txt')):
-        return jsonify({"success": False, "message": "Invalid file type. Please upload a .csv or .txt file.", "game_state": client_game_state}), 400
+    if not (filename.endswith('.csv') or filename.endswith('.txt')):
+        return jsonify({"success": False, "message": "Invalid file type. Please upload a .csv or .txt file.", "game_state": state_for_client(client_game_state)}), 400
 
     try:
         items = []
-        file_content = file.read().decode('utf-8').strip()
-
-        if file.filename.endswith('.csv'):
-            csv_reader = csv.reader(io.StringIO(file_content))
+        if filename.endswith('.csv'):
+            csv_reader = csv.reader(file_stream)
             for row in csv_reader:
                 if row:
                     items.append(row[0].strip())
         else: # .txt file
-            items = [line.strip() for line in file_content.splitlines() if line.strip()]
+            items = [line.strip() for line in file_stream if line.strip()]
 
         if not items:
-            return jsonify({"success": False, "message": "No valid items found in the file.", "game_state": client_game_state}), 400
+            return jsonify({"success": False, "message": "No valid items found in the file.", "game_state": state_for_client(client_game_state)}), 400
         
         new_game_state, action_result_msg, state_actually_changed = apply_game_action({"type": "add_items", "items": items}, client_game_state)
         
@@ -505,7 +698,7 @@ def upload_items():
         return jsonify({
             "success": True,
             "message": f"{len(items)} items uploaded successfully.",
-            "game_state": new_game_state,
+            "game_state": state_for_client(new_game_state),
         })
 
     except Exception as e:
@@ -514,18 +707,27 @@ def upload_items():
         traceback.print_exc()
         # Ensure that if an error occurs *during* item processing (not state parsing),
         # we return the client_game_state as received.
-        return jsonify({"success": False, "message": f"Error processing file: {e}", "game_state": client_game_state}), 500
-
+        return jsonify({"success": False, "message": f"Error processing file: {e}", "game_state": state_for_client(client_game_state)}), 500
+
+
+# DEFAULT_INITIAL_GAME_STATE never changes, so the two routes that only return it serialize it
+# once at startup instead of on every page load and reset.
+_RESET_GAME_RESPONSE_BODY = app.json.dumps({
+    "success": True,
+    "message": "Game state reset.",
+    "game_state": DEFAULT_INITIAL_GAME_STATE, # Send the default new state
+})
+_GET_GAME_STATE_RESPONSE_BODY = app.json.dumps({
+    "game_state": DEFAULT_INITIAL_GAME_STATE
+})
+# Lets browsers revalidate their cached copy of /get_game_state and get an empty 304 back
+_GET_GAME_STATE_ETAG = hashlib.md5(_GET_GAME_STATE_RESPONSE_BODY.encode('utf-8')).hexdigest()
 
 @app.route('/reset_game', methods=['POST'])
 def reset_game():
     # Frontend handles the actual reset of its localStorage state
     # Server just returns a fresh initial state
-    return jsonify({
-        "success": True,
-        "message": "Game state reset.",
-        "game_state": DEFAULT_INITIAL_GAME_STATE, # Send the default new state
-    })
+    return app.response_class(_RESET_GAME_RESPONSE_BODY, mimetype='application/json')
 
 @app.route('/undo_last_action', methods=['POST'])
 def undo_last_action():
@@ -539,7 +741,7 @@ def undo_last_action():
     return jsonify({
         "success": True,
         "message": "Undo operation acknowledged by server.",
-        "game_state": client_game_state # Return current state (which will be overwritten by client's undo)
+        "game_state": state_for_client(client_game_state) # Return current state (which will be overwritten by client's undo)
     })
 
 
@@ -547,11 +749,11 @@ def undo_last_action():
 def start_next_auction_action():
     client_game_state = get_state_from_request()
 
-    if client_game_state["item_list"] and client_game_state["status"] in ["waiting_for_auction_start", "item_sold", "game_over", "waiting_for_items"]:
-        if client_game_state["current_item"] and client_game_state["status"] == "bidding":
+    if client_game_state["item_list"] and client_game_state["status"] in AUCTION_STARTABLE_STATUSES:
+        if client_game_state["current_item"] and client_game_state["status"] == Status.BIDDING:
             narrative = f"Auctioneer: An auction for '{client_game_state['current_item']}' is already in progress. Please bid or sell it first."
             client_game_state["chat_log"].append({"sender": "Auctioneer", "message": narrative})
-            return jsonify({"success": False, "message": narrative, "game_state": client_game_state}), 400
+            return jsonify({"success": False, "message": narrative, "game_state": state_for_client(client_game_state)}), 400
 
         item_to_start = client_game_state["item_list"][0]
         narrative = f"Auctioneer: The auction for '{item_to_start}' is now open! Bids begin at 1 credit."
@@ -563,17 +765,17 @@ def start_next_auction_action():
         if state_actually_changed:
             new_game_state["chat_log"].append({"sender": "System", "message": f"Action processed: {action_result_msg}"})
         
-        return jsonify({"success": True, "game_state": new_game_state})
+        return jsonify({"success": True, "game_state": state_for_client(new_game_state)})
     else:
         narrative = "Auctioneer: No items available to start an auction, or game not ready. Please add items first, or initialize the game."
         client_game_state["chat_log"].append({"sender": "Auctioneer", "message": narrative})
-        return jsonify({"success": False, "message": narrative, "game_state": client_game_state}), 400
+        return jsonify({"success": False, "message": narrative, "game_state": state_for_client(client_game_state)}), 400
 
 @app.route('/sell_current_item_action', methods=['POST'])
 def sell_current_item_action():
     client_game_state = get_state_from_request()
 
-    if client_game_state["current_item"] and client_game_state["status"] == "bidding":
+    if client_game_state["current_item"] and client_game_state["status"] == Status.BIDDING:
         player_name = client_game_state["high_bidder"]
         amount = client_game_state["current_bid"]
 
@@ -590,11 +792,11 @@ def sell_current_item_action():
         if state_actually_changed:
             new_game_state["chat_log"].append({"sender": "System", "message": f"Action processed: {action_result_msg}"})
 
-        return jsonify({"success": True, "game_state": new_game_state})
+        return jsonify({"success": True, "game_state": state_for_client(new_game_state)})
     else:
         narrative = "Auctioneer: No item currently under auction to sell."
         client_game_state["chat_log"].append({"sender": "Auctioneer", "message": narrative})
-        return jsonify({"success": False, "message": narrative, "game_state": client_game_state}), 400
+        return jsonify({"success": False, "message": narrative, "game_state": state_for_client(client_game_state)}), 400
 
 @app.route('/shuffle_items_action', methods=['POST'])
 def shuffle_items_action():
@@ -609,11 +811,11 @@ def shuffle_items_action():
         if state_actually_changed:
             new_game_state["chat_log"].append({"sender": "System", "message": f"Action processed: {action_result_msg}"})
         
-        return jsonify({"success": True, "game_state": new_game_state})
+        return jsonify({"success": True, "game_state": state_for_client(new_game_state)})
     else:
         narrative = "Auctioneer: No items available to shuffle yet."
         client_game_state["chat_log"].append({"sender": "Auctioneer", "message": narrative})
-        return jsonify({"success": False, "message": narrative, "game_state": client_game_state}), 400
+        return jsonify({"success": False, "message": narrative, "game_state": state_for_client(client_game_state)}), 400
 
 @app.route('/set_inventory_sort', methods=['POST'])
 def set_inventory_sort():
@@ -622,16 +824,16 @@ def set_inventory_sort():
     client_game_state = get_state_from_request()
 
     if sort_key not in ['name', 'price'] or sort_order not in ['asc', 'desc']:
-        return jsonify({"success": False, "message": "Invalid sort key or order.", "game_state": client_game_state}), 400
+        return jsonify({"success": False, "message": "Invalid sort key or order.", "game_state": state_for_client(client_game_state)}), 400
 
-    new_game_state = copy.deepcopy(client_game_state) # Only for sorting, not a major game action
+    new_game_state = client_game_state # Only for sorting, not a major game action
     new_game_state["player_inventory_sort"] = {"key": sort_key, "order": sort_order}
     new_game_state["chat_log"].append({"sender": "System", "message": f"Player inventories will now be sorted by {sort_key} ({sort_order})."})
     
-    action_hash = hash(json.dumps({"type": "set_inventory_sort", "key": sort_key, "order": sort_order}, sort_keys=True))
+    action_hash = _action_fingerprint({"type": "set_inventory_sort", "key": sort_key, "order": sort_order})
     new_game_state["last_processed_action_hash"] = action_hash
 
-    return jsonify({"success": True, "game_state": new_game_state})
+    return jsonify({"success": True, "game_state": state_for_client(new_game_state)})
 
 
 @app.route('/get_game_state', methods=['GET'])
@@ -641,9 +843,10 @@ def get_game_state_route():
     if it doesn't find a saved state in its localStorage.
     No `history_available` here as history is client-side.
     """
-    return jsonify({
-        "game_state": DEFAULT_INITIAL_GAME_STATE
-    })
+    response = app.response_class(_GET_GAME_STATE_RESPONSE_BODY, mimetype='application/json')
+    response.set_etag(_GET_GAME_STATE_ETAG)
+    response.headers['Cache-Control'] = 'no-cache' # Always revalidate, so a new deploy is picked up
+    return response.make_conditional(request)
 
 # --- Embedded HTML, CSS, JavaScript ---
 
@@ -656,6 +859,10 @@ HTML_CONTENT = """
     <title>Rule-Based Auctioneer Game</title>
     <link href="https://fonts.googleapis.com/css2?family=Montserrat:wght@400;600;700&family=Roboto:wght@300;400;500&display=swap" rel="stylesheet">
     <style>
+        /* Rules matched by every list row or chat message (inventory headers and prices, participant
+           budgets, chat sender names) use literal copies of these colors instead of var(), to skip the
+           custom-property lookup per row; each copy is marked with the variable it stands for.
+           Keep them in sync when changing the theme. */
         :root {
             --primary-color: #4CAF50; /* Green */
             --secondary-color: #388E3C; /* Darker Green */
@@ -770,6 +977,14 @@ HTML_CONTENT = """
             overflow-y: auto; 
             overflow-x: hidden; 
             min-height: 0; /* Crucial for flex/grid items */
+            contain: layout paint style; /* Re-rendering one panel never invalidates layout in the others */
+        }
+        /* The left and center panels are plain vertical stacks of sections: a grid lays those out
+           without the flex algorithm's shrink/grow passes. */
+        .left-panel, .center-panel {
+            display: grid;
+            grid-template-columns: minmax(0, 1fr);
+            align-content: start;
         }
 
         /* --- Individual Sections within Panels (.panel-section) --- */
@@ -780,21 +995,24 @@ HTML_CONTENT = """
             margin-bottom: 20px;
             box-shadow: 0 1px 3px rgba(0,0,0,0.05);
             border: 1px solid var(--border-color);
-            flex-shrink: 0; /* Ensures sections take their natural size */
-            display: flex; 
-            flex-direction: column; 
+            display: grid; /* A vertical stack of heading and content */
+            grid-template-columns: minmax(0, 1fr);
+            align-content: start;
             overflow: hidden; 
+            contain: content;
         }
         .panel-section:last-child {
             margin-bottom: 0;
         }
 
-        /* Left Panel specific layout for action buttons/upload */
-        .left-panel .panel-section {
-            flex-shrink: 0; 
+        /* Left Panel specific layout for action buttons/upload: the last row takes the leftover
+           height, and the game management section sits at its bottom */
+        .left-panel {
+            grid-template-rows: repeat(4, auto) 1fr;
+            align-content: stretch;
         }
         .left-panel .game-management-section {
-            margin-top: auto; 
+            align-self: end;
         }
 
         /* Specific section styles */
@@ -865,28 +1083,26 @@ HTML_CONTENT = """
         }
 
 
-        /* --- Scrollable List Wrappers (Content within .panel-section) --- */
-        .scrollable-list-wrapper {
+        /* --- Scrollable Lists (Content within .panel-section) --- */
+        /* The <ul> is its own scroll container; there is no wrapper box around it. */
+        .scrollable-list {
+            list-style-type: none;
             border: 1px solid var(--border-color);
             border-radius: 8px;
             background-color: #fdfdfd;
             padding: 10px;
             box-shadow: inset 0 1px 3px rgba(0,0,0,0.03);
-            margin-bottom: 10px; 
+            margin: 0 0 10px;
             min-width: 0; 
             word-wrap: break-word; 
+            max-height: 320px;
+            overflow-y: auto;
         }
-        .panel-section:last-child .scrollable-list-wrapper {
+        .panel-section:last-child .scrollable-list {
             margin-bottom: 0; 
         }
         
-
-        .scrollable-list-wrapper ul {
-            list-style-type: none;
-            padding: 0;
-            margin: 0;
-        }
-        .scrollable-list-wrapper li {
+        .scrollable-list li {
             padding: 10px 5px;
             border-bottom: 1px dashed #eee;
             display: flex;
@@ -894,25 +1110,25 @@ HTML_CONTENT = """
             align-items: center;
             font-size: 0.95em;
         }
-        .scrollable-list-wrapper li:last-child {
+        .scrollable-list li:last-child {
             border-bottom: none;
         }
-        .scrollable-list-wrapper li:nth-child(even) {
+        .scrollable-list li:nth-child(even) {
             background-color: #f4f4f4;
         }
-        .scrollable-list-wrapper li.player-inventory-header {
+        .scrollable-list li.player-inventory-header {
             font-weight: bold;
-            background-color: var(--background-medium);
+            background-color: #E8F5E9; /* --background-medium */
             padding: 8px 5px;
-            border-bottom: 2px solid var(--primary-color);
+            border-bottom: 2px solid #4CAF50; /* --primary-color */
             margin-top: 10px;
             font-family: 'Montserrat', sans-serif;
-            color: var(--secondary-color);
+            color: #388E3C; /* --secondary-color */
             position: sticky; 
             top: 0;
             z-index: 10;
         }
-        .scrollable-list-wrapper li.player-inventory-item {
+        .scrollable-list li.player-inventory-item {
             font-style: italic;
             padding-left: 20px;
             color: #555;
@@ -920,13 +1136,45 @@ HTML_CONTENT = """
         }
         .player-inventory-item .item-price {
             font-weight: 500;
-            color: var(--secondary-color);
+            color: #388E3C; /* --secondary-color */
             margin-left: auto; 
         }
 
+        /* --- Virtualized Lists (only the rows in view are in the DOM) --- */
+        .scrollable-list.virtual-list {
+            position: relative; /* Rows are positioned inside, and scroll with the list */
+        }
+        .scrollable-list.virtual-list::before {
+            content: '';
+            display: block;
+            height: var(--virtual-list-height); /* Set from the row count, so the scrollbar spans every row */
+        }
+        .scrollable-list.virtual-list li {
+            position: absolute;
+            left: 10px; /* Inside the list's padding */
+            right: 10px;
+            height: 40px; /* Must match the rowHeight passed to createVirtualList() */
+            box-sizing: border-box;
+            margin: 10px 0 0; /* Offsets the row's top past the list's padding */
+            white-space: nowrap;
+            overflow: hidden;
+            text-overflow: ellipsis;
+            display: block;
+        }
+        #participants-list.virtual-list li,
+        #player-inventories-list.virtual-list li {
+            display: flex; /* Rows with a trailing value (budget, price) keep the flex layout */
+        }
+        .scrollable-list.virtual-list li:nth-child(even) {
+            background-color: transparent; /* DOM order != row order; striping uses .even-row */
+        }
+        .scrollable-list.virtual-list li.even-row {
+            background-color: #f4f4f4;
+        }
+
         .player-budget {
             font-weight: 600;
-            color: var(--primary-color);
+            color: #4CAF50; /* --primary-color */
         }
         .player-item-count {
             font-size: 0.8em;
@@ -997,9 +1245,22 @@ HTML_CONTENT = """
             flex-direction: column; 
             box-shadow: inset 0 1px 3px rgba(0,0,0,0.03);
             min-height: 150px; 
-            scroll-behavior: smooth;
+            scroll-behavior: auto; /* Autoscroll jumps in one frame instead of animating over several */
             word-wrap: break-word; 
             flex-grow: 1; /* Allow chat log to grow */
+            contain: strict; /* Sized by the panel, never by its messages */
+            will-change: scroll-position; /* Keep the log on its own compositor layer while it scrolls */
+            overflow-anchor: auto;
+        }
+
+        /* Scroll anchor at the bottom of the log: while it is in view, the browser keeps it there as
+           messages are inserted above it. The messages themselves are never chosen as anchors. */
+        .chat-log::after {
+            content: '';
+            display: block;
+            flex-shrink: 0;
+            height: 1px;
+            overflow-anchor: auto;
         }
         .chat-message {
             margin-bottom: 12px;
@@ -1008,6 +1269,10 @@ HTML_CONTENT = """
             max-width: 90%;
             word-wrap: break-word; 
             font-size: 0.95em;
+            /* Skip layout/paint for messages scrolled out of view; `auto` remembers each one's last rendered size */
+            content-visibility: auto;
+            contain-intrinsic-size: auto 48px;
+            overflow-anchor: none;
         }
         .chat-message:last-child {
             margin-bottom: 0;
@@ -1024,7 +1289,7 @@ HTML_CONTENT = """
             border-bottom-right-radius: 0;
         }
         .chat-message.You strong {
-            color: var(--accent-color);
+            color: #FFC107; /* --accent-color */
         }
         .chat-message.Auctioneer {
             background-color: #e3f2fd; 
@@ -1033,7 +1298,7 @@ HTML_CONTENT = """
             border-bottom-left-radius: 0;
         }
         .chat-message.Auctioneer strong {
-            color: var(--primary-color);
+            color: #4CAF50; /* --primary-color */
         }
         .chat-message.System {
             background-color: #fffde7; 
@@ -1046,7 +1311,7 @@ HTML_CONTENT = """
             max-width: none; 
         }
         .chat-message.System strong {
-            color: var(--info-color);
+            color: #2196F3; /* --info-color */
         }
 
         .chat-input {
@@ -1240,6 +1505,9 @@ HTML_CONTENT = """
                 height: auto; 
                 overflow-y: visible; 
             }
+            .chat-log {
+                contain: layout paint style; /* Panels are content-height here, so the log must size to its messages */
+            }
             .chat-input {
                 padding-top: 10px;
                 padding-bottom: 0;
@@ -1302,20 +1570,16 @@ HTML_CONTENT = """
         <div class="center-panel">
             <div class="panel-section">
                 <h2>Participants</h2>
-                <div id="participants-list-wrapper" class="scrollable-list-wrapper">
-                    <ul id="participants-list">
-                        <li>No participants yet.</li>
-                    </ul>
-                </div>
+                <ul id="participants-list" class="scrollable-list">
+                    <li>No participants yet.</li>
+                </ul>
             </div>
 
             <div class="panel-section">
                 <h2>Items Remaining <span id="items-remaining-count" class="count">(0)</span></h2>
-                <div id="items-remaining-list-wrapper" class="scrollable-list-wrapper">
-                    <ul id="items-remaining-list">
-                        <li>No items yet.</li>
-                    </ul>
-                </div>
+                <ul id="items-remaining-list" class="scrollable-list">
+                    <li>No items yet.</li>
+                </ul>
             </div>
 
             <div class="panel-section">
@@ -1329,20 +1593,16 @@ HTML_CONTENT = """
                         <button class="sort-btn" data-key="price" data-order="desc">Price (High)</button>
                     </div>
                 </div>
-                <div id="player-inventories-list-wrapper" class="scrollable-list-wrapper">
-                    <ul id="player-inventories-list">
-                        <li>No items purchased yet.</li>
-                    </ul>
-                </div>
+                <ul id="player-inventories-list" class="scrollable-list">
+                    <li>No items purchased yet.</li>
+                </ul>
             </div>
             
             <div class="panel-section">
                 <h2>Auction History</h2>
-                <div id="auction-history-list-wrapper" class="scrollable-list-wrapper">
-                    <ul id="auction-history-list">
-                        <li>No items sold yet.</li>
-                    </ul>
-                </div>
+                <ul id="auction-history-list" class="scrollable-list">
+                    <li>No items sold yet.</li>
+                </ul>
             </div>
         </div>
 
@@ -1372,6 +1632,12 @@ HTML_CONTENT = """
             </div>
         </div>
     </div>
+    <!-- Pre-parsed chat message node, cloned by createChatMessageNode() -->
+    <template id="chat-msg-tpl"><div class="chat-message"><strong></strong> <span></span></div></template>
+    <!-- Pre-parsed row contents for the participants and inventory lists, cloned into each <li> -->
+    <template id="participant-row-tpl"><span></span><span class="player-budget"></span><span class="player-item-count"></span></template>
+    <template id="inventory-item-tpl"><span></span> <span class="item-price"></span></template>
+
     <footer>
         Made with &#10084; by Souparna Paul &copy; 2025
     </footer>
@@ -1381,11 +1647,60 @@ HTML_CONTENT = """
         const MAX_HISTORY_SIZE = 20; // Client-side undo history limit
         const MAX_CHAT_LOG_FOR_SERVER = 50; // Max chat entries sent to server
         const MAX_AUCTION_HISTORY_FOR_SERVER = 20; // Max auction history entries sent to server
+        const MAX_CHAT_LOG_CLIENT = 500; // Ring-buffer cap for the local chat_log (and so the chat DOM)
+        const CHAT_BOTTOM_THRESHOLD_PX = 40; // Within this distance of the bottom counts as "following" the chat
+        // Status banner text and class per game status; `text` may depend on the state
+        const STATUS_DISPLAY = {
+            waiting_for_init: { text: "Waiting for game initialization.", cls: "warning" },
+            waiting_for_items: { text: "Game initialized. Waiting for items.", cls: "warning" },
+            waiting_for_auction_start: { text: "Items added. Ready to start next auction.", cls: "info" },
+            item_sold: { text: "Items added. Ready to start next auction.", cls: "info" },
+            bidding: { text: state => `Auction for '${state.current_item}' is active.`, cls: "success" },
+            game_over: { text: "Game Over - All items processed!", cls: "error" },
+        };
+        const UNKNOWN_STATUS_DISPLAY = { text: "", cls: "info" };
+        // Chat message class per sender type; anything else is styled as a System message
+        const SENDER_CLASS = { You: 'chat-message You', Auctioneer: 'chat-message Auctioneer', System: 'chat-message System' };
 
 
         let currentGameState = {};
         let game_state_history = []; // Client-side history for undo
-        let lastKnownChatLogLength = 0; 
+        // Chat log rendering is incremental: updateUI diffs chat_log against the entries it last rendered.
+        let renderedChatLog = []; // chat_log entries currently shown in #chat-log, in order
+        let chatSentStart = 0; // Leading chat_log entries left out of the last game_state sent to the server
+        let chatSentEnd = 0; // chat_log length when the last game_state was sent; chat deltas append after it
+        let chatPrunedCount = 0; // Entries the last server merge dropped from the front (applied by updateUI)
+        let chatNeedsRebuild = true; // chat_log was replaced wholesale (load, reset, undo)
+        let chatScrollPending = false; // A scroll-to-bottom of #chat-log is queued for the next frame
+        let uiUpdatePending = false; // A renderUI() is queued for the next frame
+        let renderedStatusText = null; // Last text/class written to #status-message
+        let renderedStatusClass = null;
+        // Cached from currentGameState by refreshDerivedState(), so updateUI can walk plain arrays
+        // instead of re-enumerating object keys on every render. participantsArr holds one
+        // { name, budget, itemCount } row per player; playerItemsArr holds [player, items] entries.
+        let participantsArr = [];
+        let playerItemsArr = [];
+        // Per-player inventory split into parallel columns ({names, namesLower, prices}), so the
+        // inventory filter/sort only touches the field it needs. Rebuilt with playerItemsArr.
+        let playerInventoryColumns = {};
+        // auction_history kept most-recent-first so the history list can render it without copying.
+        let auctionHistoryReversed = [];
+        let auctionHistoryRevision = 0; // Bumped whenever auctionHistoryReversed changes
+        let renderedAuctionHistoryRevision = -1;
+        let derivedStateRevision = 0; // Bumped by refreshDerivedState(), i.e. whenever more than the bid or chat may have changed
+        let renderedListsRevision = -1; // derivedStateRevision last rendered into the participants and items lists
+        let renderedInventoryKey = null; // Revision, search term and sort last rendered into the inventories list
+        let listsPanelVisible = true; // False while the center panel is out of the viewport (stacked narrow layout)
+        let historyAckLen = 0; // auction_history length in the last game_state sent to the server
+        // DOM elements, looked up once on DOMContentLoaded instead of on every updateUI()/action call
+        const DOM = {};
+        let auctionHistoryView = null; // Virtual list over auctionHistoryReversed
+        let participantsView = null; // Virtual list over participantsArr
+        let itemsRemainingView = null; // Virtual list over the remaining item names
+        let playerInventoriesView = null; // Virtual list over inventory header and item rows
+        let chatMessageTemplate = null; // <div class="chat-message"> from #chat-msg-tpl
+        let participantRowTemplate = null; // Contents of #participant-row-tpl
+        let inventoryItemTemplate = null; // Contents of #inventory-item-tpl
         let currentInventorySearchTerm = '';
         // currentInventorySort will be read from currentGameState.player_inventory_sort
         // on UI update, so no separate global needed if it's part of gameState.
@@ -1426,8 +1741,208 @@ HTML_CONTENT = """
             }
         }
 
+        /**
+         * Windowed renderer for a fixed-row-height list in a scrollable <ul>.
+         * Only the rows in view (plus a small overscan) exist in the DOM; a ::before spacer in the
+         * <ul> is sized to the full row count so the scrollbar still reflects the whole list.
+         */
+        // `emptyText` may be a function, for lists whose placeholder depends on the current filter.
+        // The rows come from setItems(array), or from setSource(length, itemAt) for lists that are a
+        // view over other data and shouldn't be copied into an array on every update.
+        // Rendered rows are kept between renders, keyed by `getKey(item, index)` (default: the
+        // index). A row is only re-rendered when `rowSignature(item)` (default: the item itself) differs
+        // from the last render; otherwise at most its position is updated.
+        function createVirtualList({ list, rowHeight, emptyText, renderRow, getKey, rowSignature }) {
+            const OVERSCAN_ROWS = 5;
+            let itemCount = 0;
+            let itemAt = null; // index -> item
+            let scrollFrameId = null;
+            let viewportHeight = 0; // Cached; refreshed on resize rather than read on every scroll
+            let renderedRows = new Map(); // key -> { li, signature, index }
+            let showingEmptyText = true;
+
+            function render() {
+                scrollFrameId = null;
+                if (itemCount === 0) {
+                    list.classList.remove('virtual-list');
+                    list.style.removeProperty('--virtual-list-height');
+                    const li = document.createElement('li');
+                    li.textContent = typeof emptyText === 'function' ? emptyText() : emptyText;
+                    list.replaceChildren(li);
+                    renderedRows = new Map();
+                    showingEmptyText = true;
+                    return;
+                }
+                if (showingEmptyText) {
+                    list.replaceChildren(); // Drop the placeholder (or the server-rendered initial rows)
+                    showingEmptyText = false;
+                }
+                list.classList.add('virtual-list');
+                list.style.setProperty('--virtual-list-height', `${itemCount * rowHeight}px`);
+
+                if (!viewportHeight) {
+                    viewportHeight = list.clientHeight;
+                }
+                const visibleHeight = viewportHeight || rowHeight * 10; // Not laid out yet
+                const first = Math.max(0, Math.floor(list.scrollTop / rowHeight) - OVERSCAN_ROWS);
+                const last = Math.min(itemCount, Math.ceil((list.scrollTop + visibleHeight) / rowHeight) + OVERSCAN_ROWS);
+                const visibleRows = new Map();
+                const fragment = document.createDocumentFragment();
+                for (let i = first; i < last; i++) {
+                    const item = itemAt(i);
+                    let key = getKey ? getKey(item, i) : i;
+                    if (visibleRows.has(key)) {
+                        key = `${key}#${i}`; // Duplicate key: fall back to the position
+                    }
+                    const signature = rowSignature ? rowSignature(item) : item;
+                    let row = renderedRows.get(key);
+                    if (row) {
+                        renderedRows.delete(key);
+                        if (row.signature !== signature) {
+                            row.li.textContent = '';
+                            row.li.className = '';
+                            renderRow(row.li, item, i);
+                            row.signature = signature;
+                            row.index = -1; // className was reset, so reapply the striping below
+                        }
+                    } else {
+                        row = { li: document.createElement('li'), signature, index: -1 };
+                        renderRow(row.li, item, i);
+                        fragment.appendChild(row.li);
+                    }
+                    if (row.index !== i) {
+                        row.li.style.top = `${i * rowHeight}px`;
+                        row.li.classList.toggle('even-row', i % 2 === 1);
+                        row.index = i;
+                    }
+                    visibleRows.set(key, row);
+                }
+                // Rows left over scrolled out of the window or no longer exist
+                for (const row of renderedRows.values()) {
+                    row.li.remove();
+                }
+                renderedRows = visibleRows;
+                list.appendChild(fragment); // Rows are absolutely positioned, so DOM order doesn't matter
+            }
+
+            list.addEventListener('scroll', () => {
+                if (scrollFrameId === null) {
+                    scrollFrameId = requestAnimationFrame(render);
+                }
+            });
+            if (typeof ResizeObserver !== 'undefined') {
+                new ResizeObserver(entries => {
+                    viewportHeight = entries[0].contentRect.height;
+                }).observe(list);
+            } else {
+                window.addEventListener('resize', () => { viewportHeight = 0; });
+            }
+
+            return {
+                setItems(newItems) {
+                    this.setSource(newItems.length, i => newItems[i]);
+                },
+                setSource(length, getItem) {
+                    itemCount = length;
+                    itemAt = getItem;
+                    render();
+                }
+            };
+        }
+
         // --- Initialization ---
         document.addEventListener('DOMContentLoaded', () => {
+            Object.assign(DOM, {
+                statusMessage: document.getElementById('status-message'),
+                auctionItem: document.getElementById('auction-item'),
+                currentBid: document.getElementById('current-bid'),
+                highBidder: document.getElementById('high-bidder'),
+                startAuctionBtn: document.getElementById('start-auction-btn'),
+                sellItemBtn: document.getElementById('sell-item-btn'),
+                shuffleItemsBtn: document.getElementById('shuffle-items-btn'),
+                undoBtn: document.getElementById('undo-btn'),
+                participantsList: document.getElementById('participants-list'),
+                itemsRemainingList: document.getElementById('items-remaining-list'),
+                itemsRemainingCount: document.getElementById('items-remaining-count'),
+                playerInventoriesList: document.getElementById('player-inventories-list'),
+                auctionHistoryList: document.getElementById('auction-history-list'),
+                sortButtons: document.querySelectorAll('.inventory-sort-controls .sort-btn'),
+                inventorySearchInput: document.getElementById('inventory-search-input'),
+                chatLog: document.getElementById('chat-log'),
+                userMessage: document.getElementById('user-message'),
+                itemFileInput: document.getElementById('item-file-input'),
+                listsPanel: document.querySelector('.center-panel'),
+            });
+            // Skip the list renders while the lists panel is scrolled out of view, and catch up once it
+            // is back: the revision checks in renderUI() notice what changed in the meantime.
+            // (Hidden tabs need no check of their own: requestAnimationFrame, and so renderUI(), is
+            // paused in background tabs and the queued render runs when the tab is shown again.)
+            if (typeof IntersectionObserver !== 'undefined') {
+                new IntersectionObserver(([entry]) => {
+                    listsPanelVisible = entry.isIntersecting;
+                    if (listsPanelVisible) {
+                        updateUI();
+                    }
+                }).observe(DOM.listsPanel);
+            }
+            chatMessageTemplate = document.getElementById('chat-msg-tpl').content.firstElementChild;
+            participantRowTemplate = document.getElementById('participant-row-tpl').content;
+            inventoryItemTemplate = document.getElementById('inventory-item-tpl').content;
+            auctionHistoryView = createVirtualList({
+                list: DOM.auctionHistoryList,
+                rowHeight: 40,
+                emptyText: 'No items sold yet.',
+                getKey: entry => entry, // Stable as new sales are prepended and old ones trimmed
+                renderRow: (li, entry) => {
+                    li.textContent = entry;
+                    li.title = entry; // Rows are single-line; full text on hover
+                }
+            });
+            participantsView = createVirtualList({
+                list: DOM.participantsList,
+                rowHeight: 40,
+                emptyText: 'No participants yet.',
+                getKey: participant => participant.name,
+                rowSignature: participant => `${participant.budget}|${participant.itemCount}`,
+                renderRow: (li, participant) => {
+                    li.appendChild(participantRowTemplate.cloneNode(true));
+                    const [nameSpan, budgetSpan, countSpan] = li.children;
+                    nameSpan.textContent = participant.name;
+                    budgetSpan.textContent = `${participant.budget} credits`;
+                    countSpan.textContent = `(${participant.itemCount} items)`;
+                }
+            });
+            itemsRemainingView = createVirtualList({
+                list: DOM.itemsRemainingList,
+                rowHeight: 40,
+                emptyText: 'No items remaining.',
+                renderRow: (li, item) => {
+                    li.textContent = item;
+                    li.title = item;
+                }
+            });
+            // Rows are either { header: player } or { name, price } for one inventory item
+            playerInventoriesView = createVirtualList({
+                list: DOM.playerInventoriesList,
+                rowHeight: 40,
+                emptyText: () => currentInventorySearchTerm
+                    ? `No items found matching "${currentInventorySearchTerm}".`
+                    : 'No items purchased yet.',
+                rowSignature: row => row.header !== undefined ? `header|${row.header}` : `item|${row.name}|${row.price}`,
+                renderRow: (li, row) => {
+                    if (row.header !== undefined) {
+                        li.className = 'player-inventory-header';
+                        li.textContent = `${row.header}'s Inventory`;
+                        return;
+                    }
+                    li.className = 'player-inventory-item';
+                    li.appendChild(inventoryItemTemplate.cloneNode(true));
+                    const [nameSpan, priceSpan] = li.children;
+                    nameSpan.textContent = row.name;
+                    priceSpan.textContent = `(${row.price} credits)`;
+                }
+            });
+
             // Fetch initial default state once to get the structure, then use it for loading/initializing
             fetch('/get_game_state')
                 .then(response => {
@@ -1440,12 +1955,17 @@ HTML_CONTENT = """
                     let storedState = loadFromLocalStorage();
                     if (storedState) {
                         // Merge default initial state keys into storedState for forward compatibility
+                        let addedDefaultKeys = false;
                         for (const key in initialDefaultState) {
                             if (storedState[key] === undefined) {
                                 storedState[key] = initialDefaultState[key];
+                                addedDefaultKeys = true;
                             }
                         }
                         currentGameState = storedState;
+                        if (addedDefaultKeys) {
+                            saveToLocalStorage(currentGameState); // Keep the stored JSON in sync
+                        }
                         console.log("Loading game state from local storage.");
                         // Reconstruct history if possible (not saving game_state_history to localStorage directly)
                         // so undo history will be reset on full page reload.
@@ -1455,7 +1975,10 @@ HTML_CONTENT = """
                         saveToLocalStorage(currentGameState); // Save this default state
                     }
                     
-                    lastKnownChatLogLength = currentGameState.chat_log.length;
+                    chatNeedsRebuild = true;
+                    capChatLog(); // Saves from before the cap existed may be longer
+                    refreshDerivedState();
+                    rebuildAuctionHistoryReversed();
                     // Ensure player_inventory_sort is set, even if loaded state didn't have it
                     if (!currentGameState.player_inventory_sort) {
                         currentGameState.player_inventory_sort = { key: 'name', order: 'asc' };
@@ -1469,13 +1992,13 @@ HTML_CONTENT = """
                 });
 
 
-            document.getElementById('user-message').addEventListener('keypress', function(event) {
+            DOM.userMessage.addEventListener('keypress', function(event) {
                 if (event.key === 'Enter') {
                     sendMessage();
                 }
             });
 
-            document.querySelectorAll('.inventory-sort-controls .sort-btn').forEach(button => {
+            DOM.sortButtons.forEach(button => {
                 button.addEventListener('click', () => {
                     const key = button.dataset.key;
                     const order = button.dataset.order;
@@ -1483,15 +2006,15 @@ HTML_CONTENT = """
                 });
             });
 
-            document.getElementById('inventory-search-input').addEventListener('input', function() {
+            DOM.inventorySearchInput.addEventListener('input', function() {
                 currentInventorySearchTerm = this.value.toLowerCase().trim();
                 updateUI();
             });
 
             document.querySelectorAll('.command-assistant code').forEach(codeElement => {
                 codeElement.addEventListener('click', () => {
-                    document.getElementById('user-message').value = codeElement.textContent.trim();
-                    document.getElementById('user-message').focus();
+                    DOM.userMessage.value = codeElement.textContent.trim();
+                    DOM.userMessage.focus();
                 });
             });
         });
@@ -1513,6 +2036,9 @@ HTML_CONTENT = """
             if (trimmedState.auction_history.length > MAX_AUCTION_HISTORY_FOR_SERVER) {
                 trimmedState.auction_history = trimmedState.auction_history.slice(-MAX_AUCTION_HISTORY_FOR_SERVER);
             }
+            historyAckLen = trimmedState.auction_history.length;
+            chatSentStart = state.chat_log.length - trimmedState.chat_log.length;
+            chatSentEnd = state.chat_log.length;
             return trimmedState;
         }
 
@@ -1521,34 +2047,99 @@ HTML_CONTENT = """
          * This function assumes the server's `chat_log` and `auction_history` are the
          * most up-to-date (potentially truncated) version, and we replace our local
          * versions with them. This is a trade-off for payload size.
+         * When the server flags `chat_delta`, its chat_log holds only the entries it appended,
+         * and they are added after the log we sent instead of replacing it.
          */
         function mergeServerState(serverState) {
             // Update all fields except chat_log and auction_history directly
             for (const key in serverState) {
-                if (key !== 'chat_log' && key !== 'auction_history') {
+                if (key !== 'chat_log' && key !== 'auction_history' && key !== 'chat_delta' && key !== 'state_delta') {
                     currentGameState[key] = serverState[key];
                 }
             }
             
-            // For chat_log and auction_history, we replace the local version with the server's.
-            // This means older entries (beyond MAX_CHAT_LOG_FOR_SERVER / MAX_AUCTION_HISTORY_FOR_SERVER)
-            // will effectively be lost if the server-side processing truncated them.
-            currentGameState.chat_log = serverState.chat_log;
+            if (serverState.chat_delta) {
+                const chatLog = currentGameState.chat_log;
+                chatLog.length = Math.min(chatLog.length, chatSentEnd);
+                for (const entry of serverState.chat_log) {
+                    chatLog.push(entry);
+                }
+            } else {
+                // For chat_log and auction_history, we replace the local version with the server's.
+                // This means older entries (beyond MAX_CHAT_LOG_FOR_SERVER / MAX_AUCTION_HISTORY_FOR_SERVER)
+                // will effectively be lost if the server-side processing truncated them.
+                currentGameState.chat_log = serverState.chat_log;
+                chatPrunedCount = chatSentStart; // The server's log starts where the trimmed log we sent started
+            }
+            capChatLog();
+            if (serverState.state_delta) {
+                return; // Only the listed keys changed (e.g. a bid); history and derived state still hold
+            }
             currentGameState.auction_history = serverState.auction_history;
 
-             // Ensure player_items consistency for new players added on server (e.g., via init_game)
-            if (currentGameState.participants && currentGameState.player_items) {
-                for (const player in currentGameState.participants) {
-                    if (currentGameState.player_items[player] === undefined) {
-                        currentGameState.player_items[player] = [];
-                    }
+            // The server only ever appends to the history we sent, so anything past historyAckLen is new.
+            const serverHistory = serverState.auction_history;
+            if (serverHistory.length >= historyAckLen) {
+                const previousLength = auctionHistoryReversed.length;
+                for (let i = historyAckLen; i < serverHistory.length; i++) {
+                    auctionHistoryReversed.unshift(serverHistory[i]);
                 }
-                // Remove players who might have been removed from participants but still in player_items
-                for (const player in currentGameState.player_items) {
-                    if (currentGameState.participants[player] === undefined) {
-                        delete currentGameState.player_items[player];
-                    }
+                if (auctionHistoryReversed.length > serverHistory.length) {
+                    auctionHistoryReversed.length = serverHistory.length; // Drop what the server trimmed
+                }
+                if (serverHistory.length > historyAckLen || auctionHistoryReversed.length !== previousLength) {
+                    auctionHistoryRevision++;
+                }
+            }
+            if (auctionHistoryReversed.length !== serverHistory.length ||
+                (serverHistory.length && auctionHistoryReversed[0] !== serverHistory[serverHistory.length - 1])) {
+                rebuildAuctionHistoryReversed(); // Out of sync (e.g. overlapping requests), start over
+            }
+
+            refreshDerivedState();
+        }
+
+        function rebuildAuctionHistoryReversed() {
+            auctionHistoryReversed = currentGameState.auction_history.slice().reverse();
+            auctionHistoryRevision++;
+        }
+
+        /**
+         * Syncs player_items with participants and rebuilds the cached entries arrays.
+         * Must be called whenever currentGameState.participants or player_items is replaced.
+         */
+        function refreshDerivedState() {
+            const participants = currentGameState.participants || {};
+            const playerItems = currentGameState.player_items || {};
+            derivedStateRevision++;
+
+            participantsArr = [];
+            // Ensure player_items consistency for new players added on server (e.g., via init_game)
+            for (const [player, budget] of Object.entries(participants)) {
+                if (playerItems[player] === undefined) {
+                    playerItems[player] = [];
+                }
+                participantsArr.push({ name: player, budget, itemCount: playerItems[player].length });
+            }
+            // Remove players who might have been removed from participants but still in player_items
+            for (const player of Object.keys(playerItems)) {
+                if (participants[player] === undefined) {
+                    delete playerItems[player];
+                }
+            }
+            playerItemsArr = Object.entries(playerItems);
+
+            playerInventoryColumns = {};
+            for (const [player, items] of playerItemsArr) {
+                const names = new Array(items.length);
+                const namesLower = new Array(items.length);
+                const prices = new Array(items.length);
+                for (let i = 0; i < items.length; i++) {
+                    names[i] = items[i].name;
+                    namesLower[i] = items[i].name.toLowerCase();
+                    prices[i] = items[i].price;
                 }
+                playerInventoryColumns[player] = { names, namesLower, prices };
             }
         }
 
@@ -1556,22 +2147,23 @@ HTML_CONTENT = """
         // --- Generic Send Action Function ---
         async function sendActionToServer(endpoint, payload) {
             try {
-                // IMPORTANT: Send a TRIMMED version of game_state to the server
-                const trimmedGameState = trimGameStateForServer(currentGameState);
-                const fullPayload = { ...payload, game_state: trimmedGameState };
-                
                 // For /process_chat, add "You" message to local state *before* sending, for immediate feedback
-                // and to ensure it's captured in history. Server will also append it to its trimmed log.
+                // and so it is part of the log the server appends its replies to.
                 if (endpoint === '/process_chat' && payload.message) {
                     currentGameState.chat_log.push({"sender": "You", "message": payload.message});
-                    // lastKnownChatLogLength will be updated by updateUI, or reset if mergeServerState makes it shorter
+                    capChatLog();
                     updateUI(); // Immediate UI update for the 'You' message
                 }
+
+                // IMPORTANT: Send a TRIMMED version of game_state to the server
+                const trimmedGameState = trimGameStateForServer(currentGameState);
+                const fullPayload = { ...payload, game_state: trimmedGameState };
                 
                 const response = await fetch(endpoint, {
                     method: 'POST',
                     headers: {
                         'Content-Type': 'application/json',
+                        'X-Chat-Delta': '1',
                     },
                     body: JSON.stringify(fullPayload),
                 });
@@ -1614,7 +2206,7 @@ HTML_CONTENT = """
 
         // --- Action Handlers ---
         async function sendMessage() {
-            const userMessageInput = document.getElementById('user-message');
+            const userMessageInput = DOM.userMessage;
             const message = userMessageInput.value.trim();
             if (!message) return;
 
@@ -1624,7 +2216,7 @@ HTML_CONTENT = """
         }
 
         async function uploadItems() {
-            const fileInput = document.getElementById('item-file-input');
+            const fileInput = DOM.itemFileInput;
             const file = fileInput.files[0];
 
             if (!file) {
@@ -1632,16 +2224,22 @@ HTML_CONTENT = """
                 return;
             }
 
-            const formData = new FormData();
-            formData.append('file', file);
-            // IMPORTANT: Send a TRIMMED version of game_state with the file upload
-            const trimmedGameState = trimGameStateForServer(currentGameState);
-            formData.append('game_state', JSON.stringify(trimmedGameState)); 
+            // Trimmed like every other action's state, which also sets the chat/history cursors
+            const stateJson = JSON.stringify(trimGameStateForServer(currentGameState));
+            // The body is the state JSON on one line followed by the file. A Blob built around the File
+            // only references it, so the browser streams the file from disk as it sends, and the server
+            // parses items off the request stream as they arrive.
+            const body = new Blob([stateJson, '\\n', file]);
 
             try {
                 const response = await fetch('/upload_items', {
                     method: 'POST',
-                    body: formData, // FormData automatically sets 'Content-Type': 'multipart/form-data'
+                    headers: {
+                        'Content-Type': 'text/plain; charset=utf-8',
+                        'X-Chat-Delta': '1',
+                        'X-Filename': encodeURIComponent(file.name),
+                    },
+                    body: body,
                 });
 
                 if (!response.ok) {
@@ -1695,7 +2293,9 @@ HTML_CONTENT = """
                 if (data.success) {
                     currentGameState = data.game_state; // Server sends back the clean initial state
                     saveToLocalStorage(currentGameState);
-                    lastKnownChatLogLength = currentGameState.chat_log.length; // Reset chat length tracker
+                    chatNeedsRebuild = true;
+                    refreshDerivedState();
+                    rebuildAuctionHistoryReversed();
                     updateUI();
                     alert("Game has been reset to its initial state.");
                 } else {
@@ -1727,7 +2327,9 @@ HTML_CONTENT = """
                 currentGameState = previousState;
                 saveToLocalStorage(currentGameState);
                 alert("Last action has been undone.");
-                lastKnownChatLogLength = currentGameState.chat_log.length; // Reset chat length tracker
+                chatNeedsRebuild = true;
+                refreshDerivedState();
+                rebuildAuctionHistoryReversed();
                 updateUI();
             } else {
                 alert("No previous state to undo to.");
@@ -1755,194 +2357,225 @@ HTML_CONTENT = """
         }
 
         // --- UI Update Function ---
+        function createChatMessageNode(sender, message, type) {
+            // Cloning the template skips the HTML parser, and textContent keeps message text
+            // (which includes user input) from being interpreted as markup.
+            const div = chatMessageTemplate.cloneNode(true);
+            div.className = SENDER_CLASS[type] || SENDER_CLASS.System; // Never a raw sender string as a class
+            div.children[0].textContent = `${sender}:`;
+            div.children[1].textContent = message;
+            return div;
+        }
+
+        // Drops the oldest entries once chat_log exceeds MAX_CHAT_LOG_CLIENT; updateUI removes
+        // the matching nodes from the front of the chat DOM.
+        function capChatLog() {
+            const excess = currentGameState.chat_log.length - MAX_CHAT_LOG_CLIENT;
+            if (excess > 0) {
+                currentGameState.chat_log.splice(0, excess);
+                chatPrunedCount += excess;
+            }
+        }
+
+        function isSameChatEntry(a, b) {
+            return a === b || (a.sender === b.sender && a.message === b.message);
+        }
+
+        // Scrolls the chat log to the bottom on the next animation frame. Reading scrollHeight right
+        // after inserting messages would force a synchronous layout; deferring it lets the browser lay
+        // out once, and any number of calls within a frame share a single scroll.
+        function scheduleChatScroll() {
+            if (chatScrollPending) return;
+            chatScrollPending = true;
+            requestAnimationFrame(() => {
+                chatScrollPending = false;
+                DOM.chatLog.scrollTo({ top: DOM.chatLog.scrollHeight, behavior: 'auto' });
+            });
+        }
+
         function addChatMessage(sender, message, type) {
-            const chatLog = document.getElementById('chat-log');
-            const div = document.createElement('div');
-            div.className = `chat-message ${type}`;
-            div.innerHTML = `<strong>${sender}:</strong> ${message}`;
-            chatLog.appendChild(div);
-            chatLog.scrollTop = chatLog.scrollHeight; 
+            // Read the scroll position before the insert so it doesn't force a layout
+            const chatLog = DOM.chatLog;
+            const pinned = chatLog.scrollHeight - chatLog.clientHeight - chatLog.scrollTop < CHAT_BOTTOM_THRESHOLD_PX;
+            chatLog.appendChild(createChatMessageNode(sender, message, type));
+            if (pinned) {
+                scheduleChatScroll(); // Leave a user who has scrolled up to read where they are
+            }
         }
 
+        // Queues a render of currentGameState for the next animation frame. Every caller renders the
+        // same global state, so any number of updates within a frame (e.g. the instant 'You' message
+        // and a fast server reply) cost a single render pass.
         function updateUI() {
-            // Update Status Message
-            const statusMessageDiv = document.getElementById('status-message');
-            let statusText = "Game Status: ";
-            let statusClass = "info"; 
-
-            if (currentGameState.status === "waiting_for_init") {
-                statusText += "Waiting for game initialization.";
-                statusClass = "warning";
-            } else if (currentGameState.status === "waiting_for_items") {
-                statusText += "Game initialized. Waiting for items.";
-                statusClass = "warning";
-            } else if (currentGameState.status === "waiting_for_auction_start" || currentGameState.status === "item_sold") {
-                statusText += "Items added. Ready to start next auction.";
-                statusClass = "info"; 
-            } else if (currentGameState.status === "bidding") {
-                statusText += `Auction for '${currentGameState.current_item}' is active.`;
-                statusClass = "success";
-            } else if (currentGameState.status === "game_over") {
-                statusText += "Game Over - All items processed!";
-                statusClass = "error";
-            }
-            statusMessageDiv.textContent = statusText;
-            statusMessageDiv.className = `status-message ${statusClass}`;
+            if (uiUpdatePending) return;
+            uiUpdatePending = true;
+            requestAnimationFrame(() => {
+                uiUpdatePending = false;
+                renderUI();
+            });
+        }
 
-            // Update Current Auction Info
-            document.getElementById('auction-item').textContent = currentGameState.current_item || 'None';
-            document.getElementById('current-bid').textContent = currentGameState.current_bid || 0;
-            document.getElementById('high-bidder').textContent = currentGameState.high_bidder || 'None';
-
-            // Enable/Disable Auction Control Buttons
-            const startAuctionBtn = document.getElementById('start-auction-btn');
-            const sellItemBtn = document.getElementById('sell-item-btn');
-            const shuffleItemsBtn = document.getElementById('shuffle-items-btn');
-            const undoBtn = document.getElementById('undo-btn');
-
-            startAuctionBtn.disabled = !currentGameState.item_list.length || currentGameState.status === "bidding" || currentGameState.status === "game_over";
-            sellItemBtn.disabled = !currentGameState.current_item || currentGameState.status !== "bidding";
-            shuffleItemsBtn.disabled = !currentGameState.item_list.length;
-            undoBtn.disabled = game_state_history.length === 0;
-
-
-            // Update Participants List
-            const participantsList = document.getElementById('participants-list');
-            participantsList.innerHTML = '';
-            if (Object.keys(currentGameState.participants).length === 0) {
-                participantsList.innerHTML = '<li>No participants yet.</li>';
-            } else {
-                for (const player in currentGameState.participants) {
-                    const li = document.createElement('li');
-                    // Ensure player_items key exists for the player to prevent error
-                    const ownedItemsCount = currentGameState.player_items[player] ? currentGameState.player_items[player].length : 0;
-                    li.innerHTML = `<span>${player}</span> 
-                                    <span class="player-budget">${currentGameState.participants[player]} credits</span>
-                                    <span class="player-item-count">(${ownedItemsCount} items)</span>`;
-                    participantsList.appendChild(li);
-                }
+        function renderUI() {
+            if (currentGameState.status === undefined) {
+                return; // No state yet: the initial /get_game_state fetch renders once it has merged one
             }
-
-            // Update Items Remaining List & Count
-            const itemsRemainingList = document.getElementById('items-remaining-list');
-            const itemsRemainingCountSpan = document.getElementById('items-remaining-count');
-            itemsRemainingList.innerHTML = '';
-            
-            let displayItems = [...currentGameState.item_list];
-            if (currentGameState.current_item && currentGameState.status === "bidding") {
-                const currentItemIndex = displayItems.indexOf(currentGameState.current_item);
-                if (currentItemIndex > -1) {
-                    displayItems.splice(currentItemIndex, 1); 
-                }
-                displayItems.unshift(currentGameState.current_item + " (current)"); 
+            // Read the chat scroll position before any DOM writes below, so it doesn't force a layout
+            const chatWasAtBottom = DOM.chatLog.scrollHeight - DOM.chatLog.clientHeight - DOM.chatLog.scrollTop < CHAT_BOTTOM_THRESHOLD_PX;
+
+            // Update Status Message (only written when it changed)
+            const statusDisplay = STATUS_DISPLAY[currentGameState.status] || UNKNOWN_STATUS_DISPLAY;
+            const statusText = "Game Status: " +
+                (typeof statusDisplay.text === 'function' ? statusDisplay.text(currentGameState) : statusDisplay.text);
+            if (statusText !== renderedStatusText) {
+                DOM.statusMessage.textContent = statusText;
+                renderedStatusText = statusText;
+            }
+            if (statusDisplay.cls !== renderedStatusClass) {
+                DOM.statusMessage.className = `status-message ${statusDisplay.cls}`;
+                renderedStatusClass = statusDisplay.cls;
             }
 
-            itemsRemainingCountSpan.textContent = `(${currentGameState.item_list.length})`; 
+            // Update Current Auction Info
+            DOM.auctionItem.textContent = currentGameState.current_item || 'None';
+            DOM.currentBid.textContent = currentGameState.current_bid || 0;
+            DOM.highBidder.textContent = currentGameState.high_bidder || 'None';
+
+            // Participants, items and inventories only change on a full server state (which runs
+            // refreshDerivedState()), so bid and chat updates skip these lists entirely. All of the
+            // lists wait while their panel is out of view.
+            if (listsPanelVisible && renderedListsRevision !== derivedStateRevision) {
+                renderedListsRevision = derivedStateRevision;
+
+                // Update Participants List (only the rows in view are rendered)
+                participantsView.setItems(participantsArr);
+
+                // Update Items Remaining List & Count
+                // While bidding, the current item is listed first and skipped at its place in item_list.
+                // The rows are read straight from item_list, so no copy of it is made.
+                const itemList = currentGameState.item_list;
+                const currentItem = currentGameState.status === "bidding" ? currentGameState.current_item : null;
+                if (currentItem) {
+                    const currentItemIndex = itemList.indexOf(currentItem);
+                    const restCount = currentItemIndex > -1 ? itemList.length - 1 : itemList.length;
+                    itemsRemainingView.setSource(restCount + 1, i => {
+                        if (i === 0) return currentItem + " (current)";
+                        return currentItemIndex > -1 && i > currentItemIndex ? itemList[i] : itemList[i - 1];
+                    });
+                } else {
+                    itemsRemainingView.setItems(itemList);
+                }
 
-            if (displayItems.length === 0) {
-                itemsRemainingList.innerHTML = '<li>No items remaining.</li>';
-            } else {
-                displayItems.forEach(item => {
-                    const li = document.createElement('li');
-                    li.textContent = item;
-                    itemsRemainingList.appendChild(li);
-                });
+                DOM.itemsRemainingCount.textContent = `(${itemList.length})`; 
             }
 
 
-            // Update Player Inventories List - NOW SHOWS PRICE & SORTED & FILTERED
-            const playerInventoriesList = document.getElementById('player-inventories-list');
-            playerInventoriesList.innerHTML = '';
-            let hasItemsBought = false;
-
-            // Update active sort buttons based on currentGameState.player_inventory_sort
-            document.querySelectorAll('.inventory-sort-controls .sort-btn').forEach(button => {
-                const key = button.dataset.key;
-                const order = button.dataset.order;
-                if (currentGameState.player_inventory_sort && key === currentGameState.player_inventory_sort.key && order === currentGameState.player_inventory_sort.order) {
-                    button.classList.add('active');
-                } else {
-                    button.classList.remove('active');
-                }
-            });
+            // Use currentGameState.player_inventory_sort here
+            const inventorySort = currentGameState.player_inventory_sort || { key: 'name', order: 'asc' };
+            const inventoryKey = `${derivedStateRevision}|${currentInventorySearchTerm}|${inventorySort.key}|${inventorySort.order}`;
+            if (listsPanelVisible && renderedInventoryKey !== inventoryKey) {
+                renderedInventoryKey = inventoryKey;
 
-            for (const player in currentGameState.player_items) {
-                const filteredItems = currentGameState.player_items[player].filter(item => 
-                    item.name.toLowerCase().includes(currentInventorySearchTerm)
-                );
+                // Update Player Inventories List - NOW SHOWS PRICE & SORTED & FILTERED
+                // Built as flat rows (a header per player, then their items) for the virtual list.
+                const inventoryRows = [];
 
-                const playerItems = [...filteredItems]; 
-                
-                playerItems.sort((a, b) => {
-                    let compareA, compareB;
-                    // Use currentGameState.player_inventory_sort here
-                    const sortKey = currentGameState.player_inventory_sort.key;
-                    const sortOrder = currentGameState.player_inventory_sort.order;
-
-                    if (sortKey === 'name') {
-                        compareA = a.name.toLowerCase();
-                        compareB = b.name.toLowerCase();
-                    } else { // 'price'
-                        compareA = a.price;
-                        compareB = b.price;
+                // Update active sort buttons based on currentGameState.player_inventory_sort
+                DOM.sortButtons.forEach(button => {
+                    const key = button.dataset.key;
+                    const order = button.dataset.order;
+                    if (currentGameState.player_inventory_sort && key === currentGameState.player_inventory_sort.key && order === currentGameState.player_inventory_sort.order) {
+                        button.classList.add('active');
+                    } else {
+                        button.classList.remove('active');
                     }
-
-                    if (compareA < compareB) return sortOrder === 'asc' ? -1 : 1;
-                    if (compareA > compareB) return sortOrder === 'asc' ? 1 : -1;
-                    return 0; 
                 });
 
-                if (playerItems.length > 0) {
-                    hasItemsBought = true;
-                    const headerLi = document.createElement('li');
-                    headerLi.className = 'player-inventory-header';
-                    headerLi.textContent = `${player}'s Inventory`;
-                    playerInventoriesList.appendChild(headerLi);
-                    playerItems.forEach(item => {
-                        const itemLi = document.createElement('li');
-                        itemLi.className = 'player-inventory-item';
-                        itemLi.innerHTML = `${item.name} <span class="item-price">(${item.price} credits)</span>`; 
-                        playerInventoriesList.appendChild(itemLi);
+                const sortKey = inventorySort.key;
+                const sortDir = inventorySort.order === 'asc' ? 1 : -1;
+
+                for (const [player] of playerItemsArr) {
+                    const { names, namesLower, prices } = playerInventoryColumns[player];
+                    // Filter and sort an index array; the columns themselves are never copied.
+                    const idx = [];
+                    for (let i = 0; i < namesLower.length; i++) {
+                        if (namesLower[i].includes(currentInventorySearchTerm)) {
+                            idx.push(i);
+                        }
+                    }
+                    const sortColumn = sortKey === 'name' ? namesLower : prices; // else 'price'
+                    idx.sort((a, b) => {
+                        if (sortColumn[a] < sortColumn[b]) return -sortDir;
+                        if (sortColumn[a] > sortColumn[b]) return sortDir;
+                        return 0; 
                     });
+
+                    if (idx.length > 0) {
+                        inventoryRows.push({ header: player });
+                        for (const i of idx) {
+                            inventoryRows.push({ name: names[i], price: prices[i] });
+                        }
+                    }
                 }
-            }
-            if (!hasItemsBought && !currentInventorySearchTerm) { 
-                playerInventoriesList.innerHTML = '<li>No items purchased yet.</li>';
-            } else if (!hasItemsBought && currentInventorySearchTerm) {
-                 playerInventoriesList.innerHTML = `<li>No items found matching "${currentInventorySearchTerm}".</li>`;
+                playerInventoriesView.setItems(inventoryRows);
             }
 
 
-            // Update Auction History
-            const auctionHistoryList = document.getElementById('auction-history-list');
-            auctionHistoryList.innerHTML = '';
-            // Display full local history, not just server's potentially trimmed version
-            if (currentGameState.auction_history.length === 0) {
-                auctionHistoryList.innerHTML = '<li>No items sold yet.</li>';
-            } else {
-                // Display in reverse order (most recent first)
-                [...currentGameState.auction_history].reverse().forEach(entry => {
-                    const li = document.createElement('li');
-                    li.textContent = entry;
-                    auctionHistoryList.appendChild(li);
-                });
+            // Update Auction History (most recent first; only the visible rows are rendered)
+            // Most updates only touch budgets, bids or chat, so skip the list unless the history changed.
+            if (listsPanelVisible && renderedAuctionHistoryRevision !== auctionHistoryRevision) {
+                auctionHistoryView.setItems(auctionHistoryReversed);
+                renderedAuctionHistoryRevision = auctionHistoryRevision;
             }
 
-            // Incremental Chat Log Update Logic (retained)
-            const chatLogDiv = document.getElementById('chat-log');
-            if (currentGameState.chat_log.length < lastKnownChatLogLength) {
-                chatLogDiv.innerHTML = '';
-                for (const chatEntry of currentGameState.chat_log) {
-                    addChatMessage(chatEntry.sender, chatEntry.message, chatEntry.sender);
+            // Enable/Disable Auction Control Buttons (after the list updates, so these writes are grouped)
+            DOM.startAuctionBtn.disabled = !currentGameState.item_list.length || currentGameState.status === "bidding" || currentGameState.status === "game_over";
+            DOM.sellItemBtn.disabled = !currentGameState.current_item || currentGameState.status !== "bidding";
+            DOM.shuffleItemsBtn.disabled = !currentGameState.item_list.length;
+            DOM.undoBtn.disabled = game_state_history.length === 0;
+
+            // Incremental Chat Log Update Logic
+            // Only the difference from what is already rendered touches the DOM: entries the server
+            // pruned from the front are removed, rendered entries that no longer match are removed
+            // from the end, and the rest of the new log is appended.
+            // New messages are collected in a fragment and inserted at once, so a burst of
+            // messages costs one style/layout pass instead of one per message.
+            const chatLog = currentGameState.chat_log;
+            let keptCount = 0;
+            if (!chatNeedsRebuild) {
+                const prunedCount = Math.min(chatPrunedCount, renderedChatLog.length);
+                for (let i = 0; i < prunedCount; i++) {
+                    DOM.chatLog.removeChild(DOM.chatLog.firstChild);
+                }
+                while (prunedCount + keptCount < renderedChatLog.length && keptCount < chatLog.length &&
+                       isSameChatEntry(renderedChatLog[prunedCount + keptCount], chatLog[keptCount])) {
+                    keptCount++;
                 }
-            } else if (currentGameState.chat_log.length > lastKnownChatLogLength) {
-                for (let i = lastKnownChatLogLength; i < currentGameState.chat_log.length; i++) {
-                    const chatEntry = currentGameState.chat_log[i];
-                    addChatMessage(chatEntry.sender, chatEntry.message, chatEntry.sender);
+                for (let i = prunedCount + keptCount; i < renderedChatLog.length; i++) {
+                    DOM.chatLog.removeChild(DOM.chatLog.lastChild);
                 }
             }
-            lastKnownChatLogLength = currentGameState.chat_log.length; // Update the last known length
-            chatLogDiv.scrollTop = chatLogDiv.scrollHeight; // Scroll to bottom for latest messages
+            const chatAppended = keptCount < chatLog.length;
+            const followChat = chatNeedsRebuild || chatWasAtBottom ||
+                (chatAppended && chatLog[chatLog.length - 1].sender === 'You'); // Always show the user's own message
+            if (chatAppended || chatNeedsRebuild) {
+                const fragment = document.createDocumentFragment();
+                for (let i = keptCount; i < chatLog.length; i++) {
+                    const chatEntry = chatLog[i];
+                    fragment.appendChild(createChatMessageNode(chatEntry.sender, chatEntry.message, chatEntry.sender));
+                }
+                if (chatNeedsRebuild) {
+                    DOM.chatLog.replaceChildren(fragment); // Swap the whole log in one step, with no empty intermediate state
+                } else {
+                    DOM.chatLog.appendChild(fragment);
+                }
+            }
+            renderedChatLog = chatLog.slice();
+            chatPrunedCount = 0;
+            chatNeedsRebuild = false;
+            // Scroll to the latest messages only if the user wasn't reading further up
+            if (chatAppended && followChat) {
+                scheduleChatScroll();
+            }
         }
     </script>
 </body>
@@ -1951,4 +2584,18 @@ HTML_CONTENT = """
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
+    # Flask's built-in server (debugger + reloader) is for local development only: opt in with FLASK_DEBUG=1.
+    # Otherwise serve through waitress, a multi-threaded production WSGI server.
+    if os.environ.get('FLASK_DEBUG') == '1':
+        app.run(host='0.0.0.0', port=port, debug=True)
+    else:
+        try:
+            from waitress import serve
+        except ImportError:
+            print("waitress is not installed (pip install waitress); falling back to Flask's development server.")
+            app.run(host='0.0.0.0', port=port, debug=False)
+        else:
+            # No lock is needed around game state: each request works on the state parsed from its
+            # own body, and the only module-level state (DEFAULT_INITIAL_GAME_STATE and the response
+            # bodies built from it) is never written after import.
+            serve(app, host='0.0.0.0', port=port, threads=int(os.environ.get('WAITRESS_THREADS', 4)))
\ No newline at end of file
@@ -2,7 +2,17 @@ document.addEventListener('DOMContentLoaded', () => {
     // --- WebSocket Setup ---
     const PROTOCOL = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
     const HOST = window.location.host;
-    const socket = new WebSocket(`${PROTOCOL}//${HOST}`);
+    // Ask for binary MessagePack frames only if the decoder script loaded; otherwise the server sends JSON
+    const USE_MSGPACK = typeof window.MessagePack !== 'undefined';
+    const SOCKET_URL = `${PROTOCOL}//${HOST}${USE_MSGPACK ? '/?codec=msgpack' : ''}`;
+    // Reconnect with exponential backoff plus jitter, so clients dropped by the same blip don't all retry in lockstep
+    const RECONNECT_BASE_DELAY_MS = 500;
+    const RECONNECT_MAX_DELAY_MS = 5000;
+    const RECONNECT_JITTER = 0.5; // +/-50% of the computed delay
+    let socket = null;
+    let reconnectAttempts = 0;
+    let reconnectTimer = null;
+    let pendingRejoin = null; // Session to restore after an unexpected disconnect
 
     // --- UI Elements ---
     const messageArea = document.getElementById('message-area');
@@ -182,16 +192,25 @@ document.addEventListener('DOMContentLoaded', () => {
 
 
     // --- WebSocket Event Handlers ---
-    socket.onopen = () => {
+    function handleSocketOpen() {
         console.log('Connected to WebSocket server');
         showMessage('Connected to The Grand Auction House server.', 'success');
+        reconnectAttempts = 0;
+        socketButtons.forEach(btn => btn.disabled = false);
         resetUI();
 
-        // Use sessionStorage for per-tab session data
-        const storedRoomId = sessionStorage.getItem('roomId');
-        const storedPlayerId = sessionStorage.getItem('playerId');
-        const storedPlayerName = sessionStorage.getItem('playerName');
-        const storedRole = sessionStorage.getItem('role');
+        // Use sessionStorage for per-tab session data, or the session stashed when the connection dropped
+        const session = pendingRejoin || {
+            roomId: sessionStorage.getItem('roomId'),
+            playerId: sessionStorage.getItem('playerId'),
+            playerName: sessionStorage.getItem('playerName'),
+            role: sessionStorage.getItem('role')
+        };
+        pendingRejoin = null;
+        const storedRoomId = session.roomId;
+        const storedPlayerId = session.playerId;
+        const storedPlayerName = session.playerName;
+        const storedRole = session.role;
 
         if (storedRoomId && storedPlayerId && storedRole) {
             console.log(`Attempting to rejoin room ${storedRoomId} as ${storedRole} with ID ${storedPlayerId}`);
@@ -206,12 +225,23 @@ document.addEventListener('DOMContentLoaded', () => {
             console.log("No stored session found for this tab, showing room selection.");
             roomSelectionArea.style.display = 'flex';
         }
-    };
+    }
 
-    socket.onmessage = (event) => {
-        const message = JSON.parse(event.data);
+    function handleSocketMessage(event) {
+        const message = typeof event.data === 'string'
+            ? JSON.parse(event.data)
+            : MessagePack.decode(new Uint8Array(event.data));
         console.log('Received:', message);
 
+        // The server flushes several room broadcasts from one action as a single 'batch' frame
+        if (message.type === 'batch') {
+            message.messages.forEach(handleServerMessage);
+        } else {
+            handleServerMessage(message);
+        }
+    }
+
+    function handleServerMessage(message) {
         switch (message.type) {
             case 'client_id_assigned':
                 myClientId = message.id;
@@ -295,30 +325,28 @@ document.addEventListener('DOMContentLoaded', () => {
 
             case 'auction_state_update':
                 currentAuctionState = message.state;
-                updateAuctionDisplay(message.state);
-                updateCentralAuctionDisplay(message.state);
-                updateAuctioneerItems(message.state.items);
-                updateTimerDisplay(message.state.timer);
-                updateScoreboardDisplay(message.state);
-                // Update player's budget and won items if they are in the current room
-                if (myPlayerId && message.state.players[myPlayerId]) {
-                    myPlayerBudget = message.state.players[myPlayerId].budget;
-                    playerBudgetDisplay.textContent = myPlayerBudget.toLocaleString();
-                    playerNameInput.value = message.state.players[myPlayerId].name; // Update player name in input
-                    if (message.state.players[myPlayerId].wonItems.length > 0) {
-                        playerWonItemsList.innerHTML = message.state.players[myPlayerId].wonItems.map(item =>
-                            `<li><span class="item-name">${item.name}</span> <span class="item-price">($${item.finalBid.toLocaleString()})</span></li>`
-                        ).join('');
-                    } else {
-                         playerWonItemsList.innerHTML = '<li class="placeholder-item">No items won yet.</li>';
-                    }
+                scheduleRender();
+                break;
+
+            case 'auction_state_patch':
+                if (!currentAuctionState?.players) break; // No snapshot to patch yet; one arrives on join
+                if (message.patch.length === 0) {
+                    // Nothing changed (e.g. a timer tick), so only the countdown needs refreshing
+                    updateTimerDisplay(currentAuctionState.timer);
+                    break;
                 }
+                currentAuctionState = applyStatePatch(currentAuctionState, message.patch);
+                scheduleRender();
                 break;
 
             case 'player_bid_update':
-                currentAuctionState = message.auctionState;
-                updateAuctionDisplay(message.auctionState, true);
-                updateCentralAuctionDisplay(message.auctionState, true);
+                // Refund notices sent only to the outbid player carry no auctionState; keep the
+                // current snapshot so later patches still have something to apply to.
+                if (message.auctionState) {
+                    currentAuctionState = message.auctionState;
+                    updateAuctionDisplay(message.auctionState, true);
+                    updateCentralAuctionDisplay(message.auctionState, true);
+                }
                 if (myPlayerId && message.playerId === myPlayerId) {
                     myPlayerBudget = message.playerBudget;
                     playerBudgetDisplay.textContent = myPlayerBudget.toLocaleString();
@@ -328,8 +356,10 @@ document.addEventListener('DOMContentLoaded', () => {
                     showMessage(message.message, message.success ? 'success' : 'error');
                 }
                 playSound(bidSound);
-                updateTimerDisplay(message.auctionState.timer);
-                updateScoreboardDisplay(message.auctionState);
+                if (message.auctionState) {
+                    updateTimerDisplay(message.auctionState.timer);
+                    updateScoreboardDisplay(message.auctionState);
+                }
                 break;
 
             case 'item_finalized':
@@ -379,28 +409,137 @@ document.addEventListener('DOMContentLoaded', () => {
                 showMessage(message.message, 'info');
                 break;
         }
-    };
+    }
 
-    socket.onclose = () => {
+    function handleSocketClose() {
         console.log('Disconnected from WebSocket server');
-        showMessage('Disconnected from auction server. Please restart the server or check connection.', 'error');
-
+        showMessage('Disconnected from auction server. Trying to reconnect...', 'error');
+
+        // Keep the session in memory so the automatic reconnect can rejoin the room
+        if (sessionStorage.getItem('roomId')) {
+            pendingRejoin = {
+                roomId: sessionStorage.getItem('roomId'),
+                playerId: sessionStorage.getItem('playerId'),
+                playerName: sessionStorage.getItem('playerName'),
+                role: sessionStorage.getItem('role')
+            };
+        }
         // Clear sessionStorage on disconnect to force new session on reload
         sessionStorage.removeItem('roomId');
         sessionStorage.removeItem('playerId');
         sessionStorage.removeItem('playerName');
         sessionStorage.removeItem('role');
 
-        [joinRoomBtn, createRoomBtn, setPlayerNameBtn, addItemBtn, startBiddingBtn, finalizeItemBtn, clearAuctionBtn, placeBidBtn, updateSettingsBtn, addBatchItemsBtn, globalLlmSendBtn].forEach(btn => btn.disabled = true);
+        resetUI();
+        socketButtons.forEach(btn => btn.disabled = true);
         auctionTimerDisplay.style.display = 'none';
 
-        resetUI();
-    };
+        scheduleReconnect();
+    }
 
-    socket.onerror = (error) => {
+    function handleSocketError(error) {
         console.error('WebSocket Error:', error);
         showMessage('WebSocket connection error. Is the server running?', 'error');
-    };
+    }
+
+    function scheduleReconnect() {
+        if (reconnectTimer !== null) return; // A retry is already pending
+        const baseDelay = Math.min(RECONNECT_MAX_DELAY_MS, RECONNECT_BASE_DELAY_MS * 2 ** reconnectAttempts);
+        const delay = baseDelay * (1 - RECONNECT_JITTER + Math.random() * 2 * RECONNECT_JITTER);
+        reconnectAttempts++;
+        console.log(`Reconnecting in ${Math.round(delay)}ms (attempt ${reconnectAttempts})`);
+        reconnectTimer = setTimeout(() => {
+            reconnectTimer = null;
+            connectSocket();
+        }, delay);
+    }
+
+    function connectSocket() {
+        socket = new WebSocket(SOCKET_URL);
+        socket.binaryType = 'arraybuffer';
+        socket.onopen = handleSocketOpen;
+        socket.onmessage = handleSocketMessage;
+        socket.onclose = handleSocketClose;
+        socket.onerror = handleSocketError;
+    }
+
+    // Buttons that need a live connection
+    const socketButtons = [joinRoomBtn, createRoomBtn, setPlayerNameBtn, addItemBtn, startBiddingBtn, finalizeItemBtn, clearAuctionBtn, placeBidBtn, updateSettingsBtn, addBatchItemsBtn, globalLlmSendBtn];
+    connectSocket();
+
+
+    // --- State Patches ---
+    // Applies the JSON Patch (RFC 6902) ops the server sends in 'auction_state_patch' messages.
+    function applyStatePatch(state, ops) {
+        for (const { op, path, value } of ops) {
+            if (path === '') {
+                state = value;
+                continue;
+            }
+            const tokens = path.split('/').slice(1).map(token => token.replace(/~1/g, '/').replace(/~0/g, '~'));
+            const lastToken = tokens.pop();
+            let target = state;
+            for (const token of tokens) {
+                target = target[token];
+            }
+            if (op === 'remove') {
+                if (Array.isArray(target)) target.splice(Number(lastToken), 1);
+                else delete target[lastToken];
+            } else if (Array.isArray(target) && lastToken === '-') {
+                target.push(value);
+            } else {
+                target[lastToken] = value;
+            }
+        }
+        return state;
+    }
+
+    // --- Render Scheduling ---
+    // State updates can arrive in bursts (bidding wars, timer ticks). They are applied to
+    // currentAuctionState immediately, but the DOM is rendered at most once per animation frame.
+    const MAX_COALESCED_STATES = 8; // Render straight away if this many updates pile up (e.g. throttled tab)
+    let renderFrameId = null;
+    let coalescedStateCount = 0;
+
+    function scheduleRender() {
+        coalescedStateCount++;
+        if (coalescedStateCount > MAX_COALESCED_STATES) {
+            flushRender();
+        } else if (renderFrameId === null) {
+            renderFrameId = requestAnimationFrame(flushRender);
+        }
+    }
+
+    function flushRender() {
+        if (renderFrameId !== null) {
+            cancelAnimationFrame(renderFrameId);
+            renderFrameId = null;
+        }
+        coalescedStateCount = 0;
+        if (!currentAuctionState.players) return; // State was reset (e.g. disconnect) before the frame
+        renderAuctionState(currentAuctionState);
+    }
+
+    function renderAuctionState(state) {
+        updateAuctionDisplay(state);
+        updateCentralAuctionDisplay(state);
+        updateAuctioneerItems(state.items);
+        updateTimerDisplay(state.timer);
+        updateScoreboardDisplay(state);
+        // Update player's budget and won items if they are in the current room
+        if (myPlayerId && state.players[myPlayerId]) {
+            myPlayerBudget = state.players[myPlayerId].budget;
+            playerBudgetDisplay.textContent = myPlayerBudget.toLocaleString();
+            playerNameInput.value = state.players[myPlayerId].name; // Update player name in input
+            if (state.players[myPlayerId].wonItems.length > 0) {
+                playerWonItemsList.innerHTML = state.players[myPlayerId].wonItems.map(item =>
+                    `<li><span class="item-name">${item.name}</span> <span class="item-price">($${item.finalBid.toLocaleString()})</span></li>`
+                ).join('');
+            } else {
+                 playerWonItemsList.innerHTML = '<li class="placeholder-item">No items won yet.</li>';
+            }
+        }
+    }
 
 
     // --- UI Display Management ---
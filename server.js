@@ -14,6 +14,7 @@ const GEMINI_MODEL_NAME = "gemini-2.5-flash-preview-05-20";
 
 let uuidv4;
 let GoogleGenerativeAI;
+let msgpackEncode;
 
 (async () => {
     try {
@@ -23,6 +24,9 @@ let GoogleGenerativeAI;
         const generativeAIModule = await import('@google/generative-ai');
         GoogleGenerativeAI = generativeAIModule.GoogleGenerativeAI;
 
+        const msgpackModule = await import('@msgpack/msgpack');
+        msgpackEncode = msgpackModule.encode;
+
         if (!GEMINI_API_KEY) {
             console.warn("GEMINI_API_KEY is not set. Please set it in your .env file or environment variables.");
             // Do NOT exit here, as the game can still run without AI.
@@ -37,7 +41,15 @@ let GoogleGenerativeAI;
 
     const app = express();
     const server = http.createServer(app);
-    const wss = new WebSocket.Server({ server });
+    const wss = new WebSocket.Server({
+        server,
+        // Compress larger frames (full state snapshots, batches); browsers inflate these natively.
+        // Small patches and chat-sized messages stay uncompressed to avoid the CPU cost.
+        perMessageDeflate: {
+            threshold: 2048,
+            zlibDeflateOptions: { level: 1 } // Fastest level; JSON still shrinks several-fold
+        }
+    });
 
     const PORT = process.env.PORT || 3000;
 
@@ -113,25 +125,111 @@ let GoogleGenerativeAI;
     }
 
     function broadcastToRoom(roomId, message) {
-        if (!gameRooms[roomId]) return;
+        const room = gameRooms[roomId];
+        if (!room) return;
+        // Coalesced bids must reach clients before anything that happened after them
+        if (room.pendingBids.size > 0) flushPendingBids(roomId, room);
 
         // If the message contains gameState, sanitize it before sending
         let messageToSend = { ...message }; // Shallow copy of the message object
         if (messageToSend.state) {
             messageToSend.state = getCleanGameStateForClient(messageToSend.state);
+            room.lastSentState = messageToSend.state; // Base for the next state patch
         } else if (messageToSend.auctionState) {
             messageToSend.auctionState = getCleanGameStateForClient(messageToSend.auctionState);
+            room.lastSentState = messageToSend.auctionState;
         }
 
+        // Queue instead of sending right away: everything broadcast to the room during the current
+        // handler or timer tick is flushed together as a single frame per client.
+        room.outbox.push(messageToSend);
+        scheduleRoomFlush(roomId, room);
+    }
+
+    function scheduleRoomFlush(roomId, room) {
+        if (room.flushScheduled) return;
+        room.flushScheduled = true;
+        queueMicrotask(() => flushRoomOutbox(roomId, room));
+    }
+
+    // Handlers call this after mutating room.gameState instead of broadcasting it themselves; the
+    // state goes out once, with the rest of the flush, however many mutations the cycle made.
+    function markStateDirty(roomId) {
+        const room = gameRooms[roomId];
+        if (!room) return;
+        room.stateDirty = true;
+        scheduleRoomFlush(roomId, room);
+    }
+
+    function flushRoomOutbox(roomId, room) {
+        if (room.stateDirty) {
+            room.stateDirty = false;
+            if (gameRooms[roomId] === room) broadcastGameState(roomId); // Adds the cycle's one state update
+        }
+        room.flushScheduled = false;
+        if (room.outbox.length === 0) return;
+        const messages = room.outbox;
+        room.outbox = [];
+
+        // Serialize once per wire format for every client in the room
+        const outgoing = messages.length === 1 ? messages[0] : { type: 'batch', messages };
+        let jsonPayload = null;
+        let msgpackPayload = null;
         wss.clients.forEach(client => {
             if (client.readyState === WebSocket.OPEN && client.roomId === roomId) {
-                client.send(JSON.stringify(messageToSend));
+                if (client.useMsgpack) {
+                    msgpackPayload ??= encodeMsgpack(outgoing);
+                    client.send(msgpackPayload);
+                } else {
+                    jsonPayload ??= JSON.stringify(outgoing);
+                    client.send(jsonPayload);
+                }
             }
         });
     }
 
+    // Clients that loaded the MessagePack decoder connect with ?codec=msgpack and receive binary
+    // frames (smaller, and cheaper to encode/decode than JSON text); others keep getting JSON.
+    function encodeMsgpack(message) {
+        return msgpackEncode(message, { ignoreUndefined: true }); // Match JSON.stringify, which drops undefined
+    }
+
+    // Rapid bidding is coalesced: within BID_COALESCE_MS only the latest bid per (item, bidder) is
+    // broadcast. Re-inserting the key keeps the flush in the order bids were last updated.
+    // The bidder's playerBudget is filled in at flush time, so it reflects any refund since the bid.
+    const BID_COALESCE_MS = 100;
+
+    function queueBidBroadcast(roomId, key, message) {
+        const room = gameRooms[roomId];
+        if (!room) return;
+        room.pendingBids.delete(key);
+        room.pendingBids.set(key, message);
+        if (room.bidFlushTimer === null) {
+            room.bidFlushTimer = setTimeout(() => flushPendingBids(roomId, room), BID_COALESCE_MS);
+        }
+    }
+
+    function flushPendingBids(roomId, room) {
+        clearTimeout(room.bidFlushTimer);
+        room.bidFlushTimer = null;
+        if (gameRooms[roomId] !== room) return; // Room was deleted while bids were pending
+        const messages = [...room.pendingBids.values()];
+        room.pendingBids.clear();
+        messages.forEach(message => {
+            const bidder = room.gameState.players[message.playerId];
+            broadcastToRoom(roomId, { ...message, playerBudget: bidder ? bidder.budget : undefined });
+        });
+    }
+
     function sendToClient(ws, message) {
         if (ws && ws.readyState === WebSocket.OPEN) {
+            // Deliver any queued room broadcasts (coalesced bids included) first so the client sees
+            // messages in order, e.g. an outbid refund only after the bid it refunds
+            const room = ws.roomId && gameRooms[ws.roomId];
+            if (room) {
+                if (room.pendingBids.size > 0) flushPendingBids(ws.roomId, room);
+                flushRoomOutbox(ws.roomId, room);
+            }
             // If the message contains gameState, sanitize it before sending
             let messageToSend = { ...message }; // Shallow copy of the message object
             if (messageToSend.state) {
@@ -139,8 +237,64 @@ let GoogleGenerativeAI;
             } else if (messageToSend.auctionState) {
                 messageToSend.auctionState = getCleanGameStateForClient(messageToSend.auctionState);
             }
-            ws.send(JSON.stringify(messageToSend));
+            ws.send(ws.useMsgpack ? encodeMsgpack(messageToSend) : JSON.stringify(messageToSend));
+        }
+    }
+
+    // --- State Patches ---
+    // Every client in a room receives the same broadcasts, so each room keeps the last clean state
+    // it sent (room.lastSentState) and routine updates go out as JSON Patch (RFC 6902) ops against it.
+    // Full snapshots are only sent when a client creates, joins or reconnects to a room.
+
+    function escapePointerToken(key) {
+        return String(key).replace(/~/g, '~0').replace(/\//g, '~1');
+    }
+
+    function isPlainObject(value) {
+        return value !== null && typeof value === 'object' && !Array.isArray(value);
+    }
+
+    function diffState(prev, next, path = '', ops = []) {
+        if (Array.isArray(prev) && Array.isArray(next) && next.length >= prev.length) {
+            for (let i = 0; i < prev.length; i++) {
+                diffState(prev[i], next[i], `${path}/${i}`, ops);
+            }
+            for (let i = prev.length; i < next.length; i++) {
+                ops.push({ op: 'add', path: `${path}/-`, value: next[i] });
+            }
+        } else if (isPlainObject(prev) && isPlainObject(next)) {
+            for (const key in prev) {
+                if (!(key in next)) ops.push({ op: 'remove', path: `${path}/${escapePointerToken(key)}` });
+            }
+            for (const key in next) {
+                const childPath = `${path}/${escapePointerToken(key)}`;
+                if (key in prev) {
+                    diffState(prev[key], next[key], childPath, ops);
+                } else {
+                    ops.push({ op: 'add', path: childPath, value: next[key] });
+                }
+            }
+        } else if (prev !== next) {
+            ops.push({ op: 'replace', path, value: next });
         }
+        return ops;
+    }
+
+    function broadcastGameState(roomId, fullSnapshot = false) {
+        const room = gameRooms[roomId];
+        if (!room) return;
+        // Flushed bids carry full snapshots that reset lastSentState; diff against the result, not before it
+        if (room.pendingBids.size > 0) flushPendingBids(roomId, room);
+
+        if (fullSnapshot || !room.lastSentState) {
+            room.stateDirty = false; // The snapshot covers any pending change
+            broadcastToRoom(roomId, { type: 'auction_state_update', state: room.gameState });
+            return;
+        }
+        const cleanState = getCleanGameStateForClient(room.gameState);
+        const patch = diffState(room.lastSentState, cleanState);
+        room.lastSentState = cleanState;
+        broadcastToRoom(roomId, { type: 'auction_state_patch', patch });
     }
 
     function startAuctionTimer(roomId) {
@@ -162,7 +316,7 @@ let GoogleGenerativeAI;
                 console.log(`Room ${roomId}: Auction timer ran out. Finalizing item...`);
                 finalizeCurrentAuction(roomId, true);
             }
-            broadcastToRoom(roomId, { type: 'auction_state_update', state: room.gameState });
+            markStateDirty(roomId);
         }, 1000);
     }
 
@@ -229,7 +383,7 @@ let GoogleGenerativeAI;
         room.gameState.currentHighestBid = 0;
         room.gameState.currentHighestBidder = null;
         room.gameState.auctionState = 'idle';
-        broadcastToRoom(roomId, { type: 'auction_state_update', state: room.gameState });
+        markStateDirty(roomId);
     }
 
     // --- LLM Integration Function ---
@@ -290,8 +444,9 @@ let GoogleGenerativeAI;
 
 
     // --- WebSocket Connection Handling ---
-    wss.on('connection', ws => {
+    wss.on('connection', (ws, req) => {
         ws.id = uuidv4(); // Unique ID for this WebSocket connection
+        ws.useMsgpack = new URL(req.url, 'http://localhost').searchParams.get('codec') === 'msgpack';
         ws.roomId = null;
         ws.playerId = null; // In-game player ID (uuidv4 for the game entity)
         ws.role = 'guest';
@@ -313,6 +468,12 @@ let GoogleGenerativeAI;
                         gameState: createNewGameState(),
                         auctioneerPlayerId: ws.playerId, // Stores the auctioneer's in-game ID
                         activeAuctioneerWsId: ws.id,    // Stores the active WebSocket ID
+                        lastSentState: null,            // Last clean state broadcast (base for state patches)
+                        outbox: [],                     // Broadcasts waiting for the end-of-handler flush
+                        pendingBids: new Map(),         // Latest bid broadcast per item+bidder, see queueBidBroadcast()
+                        bidFlushTimer: null,
+                        flushScheduled: false,          // An outbox flush is queued for this cycle
+                        stateDirty: false               // gameState changed since the last state broadcast
                     };
                     ws.roomId = newRoomId;
                     ws.role = 'auctioneer';
@@ -329,7 +490,7 @@ let GoogleGenerativeAI;
                     sendToClient(ws, { type: 'room_created', roomId: newRoomId, playerId: ws.playerId }); // Send player ID to client
                     sendToClient(ws, { type: 'joined_room', roomId: newRoomId, role: 'auctioneer', playerId: ws.playerId, playerName: newAuctioneerPlayer.name, budget: newAuctioneerPlayer.budget });
                     broadcastToRoom(newRoomId, { type: 'info', message: `Auction Room "${newRoomId}" created by Auctioneer ${newAuctioneerPlayer.name}.` });
-                    broadcastToRoom(newRoomId, { type: 'auction_state_update', state: gameRooms[newRoomId].gameState });
+                    broadcastGameState(newRoomId, true);
                     console.log(`Room ${newRoomId} created by ${ws.id} (Player ID: ${ws.playerId})`);
                     return;
 
@@ -355,7 +516,7 @@ let GoogleGenerativeAI;
 
                     sendToClient(ws, { type: 'joined_room', roomId: targetRoomId, role: 'player', playerId: ws.playerId, playerName: newPlayer.name, budget: newPlayer.budget });
                     broadcastToRoom(targetRoomId, { type: 'info', message: `${newPlayer.name} joined the game.` });
-                    broadcastToRoom(targetRoomId, { type: 'auction_state_update', state: gameRooms[targetRoomId].gameState });
+                    broadcastGameState(targetRoomId, true);
                     console.log(`Client ${ws.id} joined room ${targetRoomId} as player ${ws.playerId}`);
                     return;
 
@@ -379,7 +540,7 @@ let GoogleGenerativeAI;
                                     budget: room.gameState.players[ws.playerId].budget
                                 });
                                 broadcastToRoom(ws.roomId, { type: 'info', message: `Auctioneer ${room.gameState.players[ws.playerId].name} reconnected.` });
-                                broadcastToRoom(ws.roomId, { type: 'auction_state_update', state: room.gameState });
+                                broadcastGameState(ws.roomId, true);
                                 console.log(`Client ${ws.id} reconnected to room ${ws.roomId} as AUCTIONEER (Player ID: ${ws.playerId}).`);
                             } else {
                                 console.log(`Reconnect failed: Auctioneer player data missing for ${data.playerId}.`);
@@ -402,7 +563,7 @@ let GoogleGenerativeAI;
                                 budget: room.gameState.players[ws.playerId].budget
                             });
                             broadcastToRoom(ws.roomId, { type: 'info', message: `Player ${room.gameState.players[ws.playerId].name} reconnected.` });
-                            broadcastToRoom(ws.roomId, { type: 'auction_state_update', state: room.gameState });
+                            broadcastGameState(ws.roomId, true);
                             console.log(`Client ${ws.id} reconnected to room ${ws.roomId} as PLAYER (Player ID: ${ws.playerId}).`);
                         } else {
                              sendToClient(ws, { type: 'error', message: 'Reconnect failed. Session data mismatch or invalid.' });
@@ -430,7 +591,7 @@ let GoogleGenerativeAI;
                         return sendToClient(ws, { type: 'error', message: 'Player name cannot be empty.' });
                     }
                     currentGameState.players[data.playerId].name = data.name.trim().substring(0, 20);
-                    broadcastToRoom(ws.roomId, { type: 'auction_state_update', state: currentGameState });
+                    markStateDirty(ws.roomId);
                     sendToClient(ws, { type: 'info', message: `Your display name is now "${currentGameState.players[data.playerId].name}".` });
                     break;
 
@@ -450,7 +611,7 @@ let GoogleGenerativeAI;
                     currentGameState.gameSettings.auctionRoundDuration = auctionRoundDuration;
 
                     broadcastToRoom(ws.roomId, { type: 'settings_updated', settings: currentGameState.gameSettings });
-                    broadcastToRoom(ws.roomId, { type: 'auction_state_update', state: currentGameState });
+                    markStateDirty(ws.roomId);
                     console.log(`Room ${ws.roomId}: Game settings updated:`, currentGameState.gameSettings);
                     break;
 
@@ -466,7 +627,7 @@ let GoogleGenerativeAI;
                     };
                     currentGameState.items.push(newItem);
                     broadcastToRoom(ws.roomId, { type: 'item_added', item: newItem, items: currentGameState.items });
-                    broadcastToRoom(ws.roomId, { type: 'auction_state_update', state: currentGameState });
+                    markStateDirty(ws.roomId);
                     break;
 
                 case 'add_batch_items':
@@ -489,7 +650,7 @@ let GoogleGenerativeAI;
                         }
                     });
                     broadcastToRoom(ws.roomId, { type: 'batch_items_added', count: addedCount, items: currentGameState.items });
-                    broadcastToRoom(ws.roomId, { type: 'auction_state_update', state: currentGameState });
+                    markStateDirty(ws.roomId);
                     break;
 
                 case 'select_item_for_auction':
@@ -505,7 +666,7 @@ let GoogleGenerativeAI;
                         currentGameState.currentHighestBidder = null;
                         currentGameState.auctionState = 'item_selected';
                         itemToAuction.status = 'auctioning';
-                        broadcastToRoom(ws.roomId, { type: 'auction_state_update', state: currentGameState });
+                        markStateDirty(ws.roomId);
                         broadcastToRoom(ws.roomId, { type: 'info', message: `Auctioneer selected "${itemToAuction.name}" for auction. Base price: $${itemToAuction.basePrice.toLocaleString()}` });
                     } else {
                         sendToClient(ws, { type: 'error', message: 'Item not found or already auctioned/selected.' });
@@ -519,7 +680,7 @@ let GoogleGenerativeAI;
                     }
                     currentGameState.auctionState = 'bidding';
                     startAuctionTimer(ws.roomId);
-                    broadcastToRoom(ws.roomId, { type: 'auction_state_update', state: currentGameState });
+                    markStateDirty(ws.roomId);
                     broadcastToRoom(ws.roomId, { type: 'info', message: `Bidding started for "${currentGameState.currentAuctionItem.name}"!` });
                     break;
 
@@ -594,11 +755,10 @@ let GoogleGenerativeAI;
 
                     resetAuctionTimer(ws.roomId);
 
-                    broadcastToRoom(ws.roomId, {
+                    queueBidBroadcast(ws.roomId, `${currentGameState.currentAuctionItem.id}:${ws.playerId}`, {
                         type: 'player_bid_update',
                         auctionState: currentGameState,
-                        playerId: ws.playerId,
-                        playerBudget: player.budget,
+                        playerId: ws.playerId, // playerBudget is added by flushPendingBids()
                         message: `${player.name} bid $${bid.toLocaleString()} for "${currentGameState.currentAuctionItem.name}".`,
                         success: true
                     });
@@ -678,7 +838,7 @@ let GoogleGenerativeAI;
                     }
                     broadcastToRoom(ws.roomId, { type: 'info', message: `${playerName} disconnected. Highest bid retracted. Current bid reset to $${currentGameState.currentHighestBid.toLocaleString()}.` });
                     resetAuctionTimer(ws.roomId);
-                    broadcastToRoom(ws.roomId, { type: 'auction_state_update', state: currentGameState });
+                    markStateDirty(ws.roomId);
                 }
                 currentGameState.players[ws.playerId].ws = null; // Mark player's websocket as null/invalidated
 